@@ -0,0 +1,104 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import lzma
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Iterable, Mapping, Optional, Tuple, Union
+
+
+class SupportedCompression(str, Enum):
+    ZLIB = "zlib"
+    LZMA = "lzma"
+
+
+# first byte of binary plaintext for clients that negotiated compression
+BIN_HEADERS = {None: b"\x00", SupportedCompression.ZLIB: b"\x01", SupportedCompression.LZMA: b"\x02"}
+_BIN_ALGOS = {h[0]: a for a, h in BIN_HEADERS.items()}
+
+
+class DecompressionError(ValueError):
+    """payload is corrupted or expands beyond the allowed size"""
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    """compression negotiated with a client during handshake"""
+    algo: SupportedCompression
+    level: int = 6
+    threshold: int = 1024  # payloads smaller than this many bytes are sent uncompressed
+    max_size: int = 16 * 1024 * 1024  # refuse inbound payloads that decompress beyond this
+
+    @staticmethod
+    def negotiate(client_algos: Iterable[str], cfg: Mapping[str, Any]) -> Optional['CompressionSettings']:
+        """pick the first algorithm in client preference order that is allowed by the server config"""
+        allowed = set(cfg.get("algorithms") or [])
+        for algo in client_algos or []:
+            algo = getattr(algo, "value", algo)  # str enums do not hash like their value
+            if algo not in allowed:
+                continue
+            try:
+                algo = SupportedCompression(algo)
+            except ValueError:
+                continue
+            return CompressionSettings(algo=algo,
+                                       level=(cfg.get("levels") or {}).get(algo.value, 6),
+                                       threshold=cfg.get("threshold", 1024),
+                                       max_size=cfg.get("max_size", 16 * 1024 * 1024))
+        return None
+
+
+def compress(data: bytes, algo: SupportedCompression, level: int = 6) -> bytes:
+    if algo == SupportedCompression.ZLIB:
+        return zlib.compress(data, level)
+    return lzma.compress(data, preset=level)
+
+
+def decompress(data: bytes, algo: SupportedCompression, max_size: int) -> bytes:
+    """decompress at most `max_size` bytes, the output is never fully materialized for bombs"""
+    if algo == SupportedCompression.ZLIB:
+        d = zlib.decompressobj()
+    else:
+        d = lzma.LZMADecompressor()
+    try:
+        out = d.decompress(data, max_size + 1)
+    except (zlib.error, lzma.LZMAError) as e:
+        raise DecompressionError(f"invalid {algo.value} payload") from e
+    if len(out) > max_size:
+        raise DecompressionError(f"decompressed payload exceeds {max_size} bytes")
+    if not d.eof:
+        raise DecompressionError(f"truncated {algo.value} payload")
+    return out
+
+
+def pack_bin(data: bytes, settings: CompressionSettings) -> bytes:
+    """prefix binary plaintext with the compression header, compressing it if above the threshold"""
+    if len(data) < settings.threshold:
+        return BIN_HEADERS[None] + data
+    return BIN_HEADERS[settings.algo] + compress(data, settings.algo, settings.level)
+
+
+def unpack_bin(data: bytes, max_size: int) -> Tuple[Union[bytes, memoryview], Optional[SupportedCompression]]:
+    """strip the compression header from binary plaintext and decompress it
+
+    uncompressed data is returned as a memoryview, the buffer is not copied
+    """
+    algo = _BIN_ALGOS.get(data[0]) if data else None
+    if algo is None:
+        if not data or data[0] != BIN_HEADERS[None][0]:
+            raise DecompressionError("unknown compression header")
+        return memoryview(data)[1:], None
+    return decompress(data[1:], algo, max_size), algo
@@ -14,14 +14,50 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import os.path
+import time
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
 
 from json_database import JsonStorageXDG
+from ovos_utils.log import LOG
 from ovos_utils.xdg_utils import xdg_config_home, xdg_data_home
 
 
 _DEFAULT = {
     # enable the hivemind binarization protocol
     "binarize": False,  # default False because of a bug in old hivemind-bus-client versions
+    # pass memoryview slices of the decrypted frame to binary protocol handlers instead of bytes copies
+    # handlers that keep the payload after returning must copy it with bytes()
+    "binary_zero_copy": False,
+    # chunked FILE / TTS_AUDIO transfers are spooled to disk until complete
+    "binary_streams": {"max_size": 104857600,  # bytes per transfer (100MB)
+                       "max_streams": 2,  # concurrent transfers per client
+                       "max_total_size": 1073741824,  # bytes spooled at once by all clients (1GB), 0 unlimited
+                       "spool_dir": None},  # defaults to the system temp dir
+    # group NUMPY_IMAGE frames per camera for binary protocols implementing handle_numpy_image_batch
+    "numpy_image_batch": {"batch_size": 0,  # frames per batch, 0 delivers every frame on its own
+                          "max_delay": 0.1},  # seconds to wait for a batch to fill
+    # compute handshake crypto (RSA, pbkdf2) in a worker pool so other clients keep being served
+    "handshake_pool": {"workers": 0,  # 0 runs handshakes in the network thread
+                       "mode": "thread"},  # "thread" or "process"
+    # reconnecting clients present a ticket from their previous session instead of repeating the handshake
+    "session_tickets": {"enabled": False,
+                        "lifetime": 3600},  # seconds a ticket can be redeemed, tickets do not survive a restart
+    # INTERCOM session keys unwrapped with the node RSA key are cached, senders may reuse them across messages
+    "intercom": {"key_cache_size": 128},
+    # PING floods and BROADCAST/PROPAGATE messages with a "msg_id" in metadata are only handled once per node
+    "flood_dedup": {"ttl": 60,  # seconds an id is remembered
+                    "capacity": 10000,  # ids remembered exactly, oldest evicted first
+                    "bloom_capacity": 0,  # ids per bloom filter generation, remembers evicted ids, 0 disables
+                    "bloom_error_rate": 0.001,  # false positive rate, ie. new messages dropped as duplicates
+                    # evicted ids are remembered for the full ttl up to (generations - 1) * bloom_capacity ids per ttl
+                    "bloom_generations": 4},
+    # for clients using binarization, pick bitstring or json per message from the measured sizes
+    "adaptive_binarize": {"enabled": False,
+                          "min_size": 256,  # bytes of json below which bitstring overhead is not worth it
+                          "min_saving": 0.1,  # required size reduction to pay for the bitstring encode
+                          "probe_interval": 32},  # messages between re-measurements of the unused format
 
     # sort encodings by order of preference
     "allowed_encodings": ["JSON-B64", "JSON-URLSAFE-B64",
@@ -29,6 +65,35 @@ _DEFAULT = {
                           "JSON-Z85B", "JSON-Z85P",
                           "JSON-B32", "JSON-HEX"],
     "allowed_ciphers": ["CHACHA20-POLY1305", 'AES-GCM'],
+    # ignore client preference during handshake and select the cheapest allowed cipher/encoding
+    "prefer_cheapest_crypto": False,
+    # encrypt BROADCAST/PROPAGATE once with a shared key for clients that opt in during handshake
+    # the key is rotated before the next broadcast after members connect or disconnect
+    "group_key": False,
+    # pack messages sent within `window` seconds into one encrypted frame, for clients that support it
+    "batch": {"window": 0, "max_messages": 32},  # window 0 disables batching
+    # compress payloads before encryption, algorithms in order of preference, negotiated during handshake
+    "compression": {"algorithms": ["zlib", "lzma"],
+                    "levels": {"zlib": 6, "lzma": 6},
+                    "threshold": 1024,  # bytes, smaller payloads are not worth compressing
+                    "max_size": 16777216},  # refuse inbound payloads that decompress beyond this (16MB)
+
+    # seconds between batched writes of client last_seen timestamps, 0 to write on every message
+    "last_seen_flush_interval": 10,
+
+    # per client outbound queues drained by a writer pool, a slow client can not delay the others
+    "outbound_queue": {
+        "max_size": 0,  # messages buffered per client, 0 sends synchronously from the calling thread
+        "workers": 4,
+        # seconds a single write may block before the client is disconnected and its writer replaced, 0 never
+        "send_timeout": 10,
+        # "drop_oldest", "drop_type" or "disconnect"
+        # "drop_type" disconnects the client when the queue is full and nothing queued is droppable
+        "overflow": "drop_oldest",
+        # hivemind or ovos message types that "drop_type" may discard, batch frames only if all their messages are
+        "droppable_types": ["ping", "recognizer_loop:audio_output_start",
+                            "recognizer_loop:audio_output_end"]
+    },
 
     # configure various plugins
     "agent_protocol": {"module": "hivemind-ovos-agent-plugin",
@@ -52,11 +117,34 @@ _DEFAULT = {
                              "cert_name": "hivemind"
                          }},
     "database": {"module": "hivemind-json-db-plugin",
+                 "sync_interval": 1,  # min seconds between checks for external changes (eg. admin CLI)
+                 # append changes to a journal instead of rewriting the whole database on every commit
+                 # only for json based databases, sqlite already writes incrementally
+                 "journal": False,
+                 "journal_compact_entries": 1000,  # rewrite the snapshot after this many journal records
+                 "journal_fsync": False,  # fsync every append, survives power loss at the cost of write latency
                  "hivemind-json-db-plugin": {
                      "name": "clients",
                      "subfolder": "hivemind-core"
+                 },
+                 # built-in, recommended for large fleets
+                 "hivemind-core-sqlite-db": {
+                     "name": "clients",
+                     "subfolder": "hivemind-core"
                  }}
 }
+
+# min seconds between checks of server.json mtime
+CONFIG_CHECK_INTERVAL = 2
+
+_snapshot: Optional[Mapping[str, Any]] = None
+_snapshot_stamp: Optional[Tuple[int, int]] = None
+_snapshot_lock = Lock()
+_last_check = 0.0
+_watcher = None
+_changed = False  # set by the file watcher
+
+
 def get_server_config() -> JsonStorageXDG:
     """from ~/.config/hivemind-core/server.json """
     db = JsonStorageXDG("server",
@@ -70,3 +158,67 @@ def get_server_config() -> JsonStorageXDG:
         if k not in db:
             db[k] = v
     return db
+
+
+def _freeze(obj: Any) -> Any:
+    """recursively convert dicts to read only mappings and lists to tuples"""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _on_config_changed(path: str):
+    global _changed
+    if _snapshot is not None and path == _snapshot_path():
+        _changed = True
+
+
+def _snapshot_path() -> str:
+    return os.path.join(xdg_config_home(), "hivemind-core", "server.json")
+
+
+def _start_watcher(path: str):
+    """get notified of changes through inotify when available"""
+    global _watcher
+    try:
+        from ovos_utils.file_utils import FileWatcher
+        _watcher = FileWatcher([path], callback=_on_config_changed)
+    except Exception as e:
+        LOG.debug(f"config file watcher not available, polling mtime instead: {e}")
+        _watcher = False
+
+
+def get_config_snapshot() -> Mapping[str, Any]:
+    """process-wide, read only view of ~/.config/hivemind-core/server.json
+
+    loaded once and reloaded only when the file changes,
+    nested dicts are read only mappings and lists are tuples,
+    use get_server_config() to get an editable copy
+    """
+    global _snapshot, _snapshot_stamp, _last_check, _changed
+    # the watcher makes changes visible immediately, polling still catches
+    # edits it misses (eg. editors replacing the file instead of writing to it)
+    if _snapshot is not None and not _changed and time.monotonic() - _last_check < CONFIG_CHECK_INTERVAL:
+        return _snapshot
+    with _snapshot_lock:
+        _last_check = time.monotonic()
+        path = _snapshot_path()
+        stamp = _file_stamp(path)
+        if _snapshot is None or _changed or stamp != _snapshot_stamp:
+            _changed = False
+            _snapshot = _freeze(dict(get_server_config()))
+            _snapshot_stamp = _file_stamp(path)  # get_server_config creates the file if missing
+            LOG.debug(f"loaded server config snapshot: {path}")
+            if _watcher is None:
+                _start_watcher(path)
+    return _snapshot
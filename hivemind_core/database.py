@@ -13,16 +13,82 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from typing import List, Optional, Iterable
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from tempfile import gettempdir
+from threading import RLock, Lock, Event, Thread
+from typing import List, Optional, Iterable, Dict, Set, Tuple, Any
 
+from combo_lock import ComboLock
 from ovos_utils.log import LOG
+from ovos_utils.xdg_utils import xdg_data_home
 
 from hivemind_core.config import get_server_config
+from hivemind_core.journal import ClientJournal
+from hivemind_core.sqlite_database import SQLiteDB
 from hivemind_plugin_manager import DatabaseFactory
 from hivemind_plugin_manager.database import Client
 
+# database backends shipped with hivemind-core, available without installing plugins
+BUILTIN_DATABASES = {
+    "hivemind-core-sqlite-db": SQLiteDB
+}
+
+# fields compiled into the runtime ClientPolicy, changes to anything else (eg. last_seen) keep policies valid
+_POLICY_FIELDS = ("api_key", "name", "is_admin", "can_broadcast", "can_escalate", "can_propagate",
+                  "intent_blacklist", "skill_blacklist", "message_blacklist", "allowed_types")
+
+
+def _policy_key(client: Client) -> Tuple:
+    """hashable snapshot of the client fields that affect its permissions, starts with (api_key, name)"""
+    return tuple(tuple(v) if isinstance(v, list) else v
+                 for v in (getattr(client, f, None) for f in _POLICY_FIELDS))
+
+
+class ClientIdSequence:
+    """persistent, monotonic client_id allocator, ids are never reused after a client is deleted"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # shared with other processes allocating ids (eg. admin CLI)
+        self.lock = ComboLock(os.path.join(gettempdir(), os.path.basename(path) + ".lock"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _read(self) -> int:
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 1)
+        except (OSError, ValueError):
+            return 1
+
+    def _write(self, next_id: int):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(next_id))
+        os.replace(tmp, self.path)
+
+    def allocate(self, count: int = 1, floor: int = 1) -> int:
+        """reserve `count` consecutive ids, never lower than `floor`
+
+        Returns:
+            the first reserved id
+        """
+        with self.lock:
+            first = max(self._read(), floor)
+            self._write(first + count)
+        return first
+
+    def release(self, first_unused: int, end: int):
+        """give back the unused tail of a reservation, only if nothing was allocated after it"""
+        with self.lock:
+            if self._read() == end:
+                self._write(first_unused)
+
 
 class ClientDatabase:
+    ID_BLOCK_SIZE = 1000  # client ids reserved at once by add_clients_bulk
 
     def __init__(self, config=None):
         """
@@ -30,28 +96,287 @@ class ClientDatabase:
         """
         config = config or get_server_config()["database"]
         name = config["module"]
-        db_class = DatabaseFactory.get_class(name)
+        db_class = BUILTIN_DATABASES.get(name) or DatabaseFactory.get_class(name)
         LOG.info(f"Database: {db_class.__name__}")
         self.db = db_class(**config.get(name, {}))
+        # json plugins rewrite the whole file on commit, external changes must be merged before that
+        self._snapshot_path: Optional[str] = getattr(getattr(self.db, "_db", None), "path", None)
+
+        db_config = config.get(name, {})
+        data_path = os.path.join(xdg_data_home(),
+                                 db_config.get("subfolder", "hivemind-core"),
+                                 db_config.get("name", "clients"))
+
+        # optional append-only journal, commits write only the changes instead of the whole database
+        self.journal: Optional[ClientJournal] = None
+        if config.get("journal") and not self._snapshot_path:
+            # incremental backends (eg. sqlite) already write only the changes
+            LOG.warning(f"client journal requires a json based database, ignored for {db_class.__name__}")
+        elif config.get("journal"):
+            path = f"{self._snapshot_path}.journal"
+            self.journal = ClientJournal(path,
+                                         compact_entries=config.get("journal_compact_entries", 1000),
+                                         fsync=config.get("journal_fsync", False))
+            self.journal.replay(self.db, 0)
+            LOG.debug(f"client journal: {path}")
+
+        # change detection, lets callers skip reloading storage when nothing changed
+        self.sync_interval: float = config.get("sync_interval", 1)  # min seconds between storage checks
+        self.generation = 0  # bumped whenever client permissions, api_key or name change
+        self._stamp = self.storage_stamp()
+        self._last_check = time.monotonic()
+        # serializes every backend call, held from __enter__ to __exit__ so a reload can not land inside a commit
+        # always taken before self._lock
+        self._storage_lock = RLock()
+        # changes not committed yet, re-applied when storage is reloaded, client_id -> ("put" | "del", client)
+        self._pending: Dict[int, Tuple[str, Client]] = {}
+
+        # in-memory hash indexes, avoid scanning every record on lookups
+        # backends with their own indexes (eg. sqlite) answer lookups directly and are never loaded in full
+        # backends without a file fingerprint (eg. redis plugins) can not be refreshed cheaply, they are queried
+        # per lookup like backends with their own indexes
+        self.in_memory_index = bool(self._storage_paths()) and not getattr(self.db, "indexed_lookups", False)
+        # lookups skip the storage lock, a flush or commit in progress never delays the network thread
+        self.concurrent_reads = bool(getattr(self.db, "concurrent_reads", False))
+        self._lock = RLock()
+        self._clients: Dict[int, Client] = {}
+        self._api_keys: Dict[str, int] = {}
+        self._names: Dict[str, Set[int]] = {}
+        self._indexed_keys: Dict[int, Tuple] = {}  # client_id -> _policy_key when indexed
+        self._max_client_id = 0  # highest client_id seen in storage, including revoked entries
+        self._reindex()
+
+        self.id_sequence = ClientIdSequence(f"{data_path}.seq")
+
+    def _reindex(self):
+        """rebuild all lookup indexes from the backend"""
+        if not self.in_memory_index:
+            if hasattr(self.db, "max_client_id"):
+                max_client_id = self.db.max_client_id()
+            else:  # only when loaded, stamp-less backends are never reindexed afterwards
+                max_client_id = max((c.client_id for c in self.db), default=0)
+            with self._lock:
+                self._max_client_id = max(self._max_client_id, max_client_id)
+                self.generation += 1  # can not tell what changed without reading every row
+            return
+        clients = list(self.db)  # read storage before locking, lookups keep using the old indexes meanwhile
+        with self._lock:
+            generation, old = self.generation, self._indexed_keys
+            self._clients = {}
+            self._api_keys = {}
+            self._names = {}
+            self._indexed_keys = {}
+            for client in clients:
+                self._index(client)
+            # reloading identical permissions must not invalidate every compiled client policy
+            self.generation = generation if self._indexed_keys == old else generation + 1
+
+    def _index(self, client: Client):
+        with self._lock:
+            self._max_client_id = max(self._max_client_id, client.client_id)
+            if client.api_key == "revoked":
+                # deleted entries are kept in the backend to avoid reusing client_id, never index them
+                self._unindex(client.client_id)
+                return
+            # keep the indexed values, callers may mutate the Client object before calling update_item
+            key = _policy_key(client)
+            old = self._indexed_keys.get(client.client_id)
+            if old is not None and old[:2] != key[:2]:
+                self._unindex(client.client_id)  # api_key or name changed
+            self._clients[client.client_id] = client
+            self._api_keys[client.api_key] = client.client_id
+            self._names.setdefault(client.name, set()).add(client.client_id)
+            self._indexed_keys[client.client_id] = key
+            if key != old:  # eg. last_seen only updates
+                self.generation += 1
+
+    def _unindex(self, client_id: int):
+        with self._lock:
+            self._clients.pop(client_id, None)
+            key = self._indexed_keys.pop(client_id, None)
+            if key is None:
+                return
+            api_key, name = key[:2]
+            if self._api_keys.get(api_key) == client_id:
+                self._api_keys.pop(api_key)
+            ids = self._names.get(name)
+            if ids is not None:
+                ids.discard(client_id)
+                if not ids:
+                    self._names.pop(name)
+            self.generation += 1
+
+    def _storage_paths(self) -> List[str]:
+        """files the backend persists to"""
+        paths = getattr(self.db, "storage_paths", None)  # declared by backends, eg. SQLiteDB
+        if paths is not None:
+            return list(paths)
+        return [self._snapshot_path] if self._snapshot_path else []  # json based plugins
+
+    def storage_stamp(self) -> Optional[Tuple[int, ...]]:
+        """cheap fingerprint of the backing store (mtime, size) followed by the journal (mtime, size)
+        if enabled, None if the backend is not file based"""
+        paths = self._storage_paths()
+        if not paths:
+            return None
+        stamp = ()
+        for p in (paths + [self.journal.path] if self.journal else paths):
+            try:
+                st = os.stat(p)
+                stamp += (st.st_mtime_ns, st.st_size)
+            except OSError:  # not committed yet
+                stamp += (0, 0)
+        return stamp
+
+    def _snapshot_changed(self) -> bool:
+        """the snapshot part of the storage stamp differs from the one we loaded, ignores the journal"""
+        stamp = self.storage_stamp()
+        return stamp is not None and self._stamp is not None and stamp[:-2] != self._stamp[:-2]
 
     def sync(self):
-        """update db from disk if needed"""
+        """update db from disk if needed
+
+        network plugins call this for every new connection, storage is only reloaded
+        if it changed since it was last loaded, backends without a file fingerprint only sync themselves
+        """
+        stamp = self.storage_stamp()
+        if stamp is None:
+            self._sync_untracked()
+            return
+        if stamp == self._stamp:
+            self._last_check = time.monotonic()
+            return
+        with self._storage_lock:
+            # another thread may have reloaded or committed while we waited
+            if self.storage_stamp() != self._stamp:
+                self._sync()
+
+    def _sync_untracked(self):
+        """sync a backend without a file fingerprint, never reads every client
+
+        lookups already go to the backend, bumping the generation makes clients
+        look their permissions up again instead of reusing the compiled policy
+        """
+        with self._storage_lock:
+            self.db.sync()
+        with self._lock:
+            self.generation += 1
+        self._last_check = time.monotonic()
+
+    def _sync(self):
+        # called with the storage lock held
         self.db.sync()
+        if self.journal is not None:
+            self.journal.replay(self.db, 0)
+        # reloading must not discard changes made since the last commit
+        for op, client in list(self._pending.values()):
+            if op == "put":
+                self.db.update_item(client)
+            else:
+                self.db.delete_item(client)
+        self._reindex()
+        self._stamp = self.storage_stamp()
+        self._last_check = time.monotonic()
+
+    def refresh(self) -> bool:
+        """sync only if the backing store changed since it was last loaded
+
+        storage is checked at most once every `sync_interval` seconds,
+        backends without a file fingerprint are synced on every check, see _sync_untracked
+
+        Returns:
+            True if the database was reloaded
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.sync_interval:
+            return False
+        self._last_check = now
+        stamp = self.storage_stamp()
+        if stamp is None:
+            self._sync_untracked()
+            return True
+        if stamp == self._stamp:
+            return False
+        with self._storage_lock:
+            # another thread may have reloaded or committed while we waited
+            stamp = self.storage_stamp()
+            if stamp is not None and stamp == self._stamp:
+                return False
+            if (self.journal is not None and stamp is not None and self._stamp is not None
+                    and stamp[:-2] == self._stamp[:-2] and stamp[-1] >= self.journal.offset):
+                # snapshot unchanged, only apply records appended to the journal
+                for client in self.journal.replay(self.db):
+                    self._index(client)
+                self._stamp = stamp
+                return True
+            self._sync()
+            return True
+
+    def _put(self, client: Client, new: bool = False) -> bool:
+        with self._storage_lock:
+            old = None if new or self.in_memory_index else self.get_client_by_id(client.client_id)
+            success = self.db.add_item(client) if new else self.db.update_item(client)
+            if success is not False:
+                if self.in_memory_index:
+                    self._index(client)
+                else:
+                    with self._lock:
+                        self._max_client_id = max(self._max_client_id, client.client_id)
+                        if old is None or _policy_key(old) != _policy_key(client):
+                            self.generation += 1
+                if self.journal is not None:
+                    self.journal.record_put(client)
+                else:
+                    self._pending[client.client_id] = ("put", client)
+            return success
 
     def delete_client(self, key: str) -> bool:
-        user = self.get_client_by_api_key(key)
-        if user:
-            return self.db.delete_item(user)
-        return False
+        with self._storage_lock:
+            user = self.get_client_by_api_key(key)
+            if user:
+                if self.in_memory_index:
+                    self._unindex(user.client_id)
+                else:
+                    with self._lock:
+                        self.generation += 1
+                if self.journal is not None:
+                    self.journal.record_delete(user)
+                else:
+                    self._pending[user.client_id] = ("del", user)
+                return self.db.delete_item(user)
+            return False
+
+    def _search(self, key: str, val: Any) -> List[Client]:
+        """backend lookup for backends with indexed_lookups, revoked entries excluded"""
+        if self.concurrent_reads:
+            clients = self.db.search_by_value(key, val)
+        else:
+            with self._storage_lock:
+                clients = self.db.search_by_value(key, val)
+        return [c for c in clients if c.api_key != "revoked"]
 
     def get_clients_by_name(self, name: str) -> List[Client]:
-        return self.db.search_by_value("name", name)
+        if not self.in_memory_index:
+            return self._search("name", name)
+        with self._lock:
+            return [self._clients[i] for i in sorted(self._names.get(name, ()))]
 
     def get_client_by_api_key(self, api_key: str) -> Optional[Client]:
-        search: List[Client] = self.db.search_by_value("api_key", api_key)
-        if len(search):
-            return search[0]
-        return None
+        if not self.in_memory_index:
+            clients = self._search("api_key", api_key)
+            return clients[-1] if clients else None  # the in-memory index also keeps the latest
+        with self._lock:
+            client_id = self._api_keys.get(api_key)
+            if client_id is None:
+                return None
+            return self._clients.get(client_id)
+
+    def get_client_by_id(self, client_id: int) -> Optional[Client]:
+        if not self.in_memory_index:
+            clients = self._search("client_id", client_id)
+            return clients[0] if clients else None
+        with self._lock:
+            return self._clients.get(client_id)
 
     def add_client(self,
                    name: str,
@@ -85,38 +410,287 @@ class ClientDatabase:
                 user.crypto_key = crypto_key
             if password:
                 user.password = password
-            return self.db.update_item(user)
+            return self.update_item(user)
+
+        user = self._new_client(self._allocate_ids(), name, key, admin,
+                                intent_blacklist, skill_blacklist, message_blacklist,
+                                allowed_types, crypto_key, password)
+        return self._put(user, new=True)
 
-        user = Client(
+    def _allocate_ids(self, count: int = 1) -> int:
+        """reserve `count` new client ids, returns the first"""
+        # the floor covers databases created before the sequence existed
+        return self.id_sequence.allocate(count, floor=self._max_client_id + 1)
+
+    @staticmethod
+    def _new_client(client_id: int,
+                    name: str,
+                    key: str = "",
+                    admin: bool = False,
+                    intent_blacklist: Optional[List[str]] = None,
+                    skill_blacklist: Optional[List[str]] = None,
+                    message_blacklist: Optional[List[str]] = None,
+                    allowed_types: Optional[List[str]] = None,
+                    crypto_key: Optional[str] = None,
+                    password: Optional[str] = None) -> Client:
+        if crypto_key is not None:
+            crypto_key = crypto_key[:16]
+        return Client(
             api_key=key,
             name=name,
             intent_blacklist=intent_blacklist,
             skill_blacklist=skill_blacklist,
             message_blacklist=message_blacklist,
             crypto_key=crypto_key,
-            client_id=self.total_clients() + 1,
+            client_id=client_id,
             is_admin=admin,
             password=password,
             allowed_types=allowed_types,
         )
-        return self.db.add_item(user)
 
-    def update_item(self, client: Client):
-        self.db.update_item(client)
+    def add_clients_bulk(self, clients: Iterable[Dict[str, Any]]) -> int:
+        """add many clients in one pass, each dict takes the keyword arguments of add_client
+
+        existing access keys are updated, nothing is committed, use the database as a context manager
+
+        Returns:
+            number of clients added or updated
+        """
+        count = 0
+        next_id = end = 0
+        for kwargs in clients:
+            if self.get_client_by_api_key(kwargs.get("key", "")):
+                success = self.add_client(**kwargs)
+            else:
+                if next_id == end:  # reserve ids in blocks, one sequence write per block
+                    next_id = self._allocate_ids(self.ID_BLOCK_SIZE)
+                    end = next_id + self.ID_BLOCK_SIZE
+                success = self._put(self._new_client(next_id, **kwargs), new=True)
+                if success:
+                    next_id += 1
+            count += bool(success)
+        if next_id != end:
+            self.id_sequence.release(next_id, end)
+        return count
+
+    def iter_clients(self, batch_size: int = 500) -> Iterable[List[Client]]:
+        """stream all stored clients in lists of up to `batch_size`"""
+        batch = []
+        for client in self:
+            batch.append(client)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def update_item(self, client: Client) -> bool:
+        return self._put(client)
 
     def total_clients(self) -> int:
-        return len(self.db)
+        with self._storage_lock:
+            return len(self.db)
+
+    def close(self):
+        """release backend resources (eg. sqlite connections), pending changes must be committed first"""
+        close = getattr(self.db, "close", None)
+        if close is not None:
+            close()
 
     def __enter__(self):
-        """Context handler"""
+        """Context handler, holds the storage lock until the changes are committed"""
+        self._storage_lock.acquire()
         return self
 
     def __iter__(self) -> Iterable[Client]:
-        yield from self.db
+        if self.concurrent_reads:
+            yield from self.db  # rows streamed from a per thread connection, never reloaded underneath us
+            return
+        with self._storage_lock:  # never hold the lock across a yield
+            clients = list(self.db)
+        yield from clients
 
     def __exit__(self, _type, value, traceback):
         """Commits changes and Closes the session"""
         try:
-            self.db.commit()
+            if self.journal is None:
+                in_sync = self.storage_stamp() == self._stamp
+                if not in_sync and self._snapshot_path:
+                    # another process (eg. admin CLI) committed since we loaded, a full rewrite would
+                    # drop its changes, reload and re-apply ours on top first
+                    self._sync()
+                    in_sync = True
+                self.db.commit()
+                self._pending.clear()
+            else:
+                in_sync = self.journal.append()
+                if self.journal.needs_compaction():
+                    if self._snapshot_changed():
+                        # another process compacted since we loaded, writing our snapshot would drop its changes
+                        self._sync()
+                    changed = self.journal.compact(self.db, is_stale=self._snapshot_changed)
+                    if changed is None:  # compacted again while we reloaded, retried on the next commit
+                        self._sync()
+                    else:
+                        for client in changed:
+                            self._index(client)
+                    in_sync = True
+            if in_sync:
+                # our own writes do not require a reload, foreign ones are picked up by the next refresh
+                self._stamp = self.storage_stamp()
         except Exception as e:
             LOG.error(e)
+        finally:
+            self._storage_lock.release()
+
+
+class PresenceBuffer:
+    """write-behind buffer for client last_seen timestamps
+
+    timestamps are recorded in memory and flushed to the database in a single
+    batched commit every `flush_interval` seconds and on `stop()`,
+    a `flush_interval` <= 0 writes through on every update
+    """
+
+    def __init__(self, db: ClientDatabase, flush_interval: float = 10):
+        self.db = db
+        self.flush_interval = flush_interval
+        self._dirty: Dict[str, float] = {}  # api_key -> last_seen
+        self._lock = Lock()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self):
+        if self.flush_interval > 0 and self._thread is None:
+            self._thread = Thread(target=self._run, name="PresenceBuffer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                LOG.error(f"failed to flush last seen timestamps: {e}")
+
+    def touch(self, api_key: str, timestamp: Optional[float] = None):
+        """record client activity, persisted on next flush"""
+        timestamp = timestamp or time.time()
+        with self._lock:
+            self._dirty[api_key] = timestamp
+        # keep the indexed client up to date for readers in this process
+        user = self.db.get_client_by_api_key(api_key) if self.db.in_memory_index else None
+        if user:
+            user.last_seen = timestamp
+        if self.flush_interval <= 0:
+            self.flush()
+
+    def flush(self) -> int:
+        """write all pending timestamps in one commit, returns number of clients updated"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+        updated = 0
+        with self.db:
+            for api_key, timestamp in dirty.items():
+                user = self.db.get_client_by_api_key(api_key)
+                if user is None:  # deleted since last interaction
+                    continue
+                user.last_seen = timestamp
+                self.db.update_item(user)
+                updated += 1
+        LOG.debug(f"flushed last seen timestamps for {updated} clients")
+        return updated
+
+    def stop(self):
+        """stop the flush thread and persist anything still pending"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+
+class AsyncClientDatabase:
+    """executor backed facade over ClientDatabase
+
+    storage I/O runs in worker threads, methods come in two flavours
+        <method>_future(...) -> concurrent.futures.Future, for threaded callers
+        a<method>(...) -> awaitable, for asyncio callers
+    """
+
+    def __init__(self, db: ClientDatabase, max_workers: int = 1):
+        self.db = db
+        # a single worker by default, keeps storage operations ordered
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="ClientDatabase")
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        """run a ClientDatabase method in the executor"""
+        return self._executor.submit(getattr(self.db, method), *args, **kwargs)
+
+    def _await(self, method: str, *args, **kwargs) -> "asyncio.Future[Any]":
+        return asyncio.wrap_future(self.submit(method, *args, **kwargs))
+
+    def _commit(self, method: str, *args, **kwargs):
+        with self.db:
+            return getattr(self.db, method)(*args, **kwargs)
+
+    def _commit_future(self, method: str, *args, **kwargs) -> Future:
+        return self._executor.submit(self._commit, method, *args, **kwargs)
+
+    # concurrent.futures variants
+    def sync_future(self) -> Future:
+        return self.submit("sync")
+
+    def refresh_future(self) -> Future:
+        return self.submit("refresh")
+
+    def get_client_by_api_key_future(self, api_key: str) -> Future:
+        return self.submit("get_client_by_api_key", api_key)
+
+    def get_clients_by_name_future(self, name: str) -> Future:
+        return self.submit("get_clients_by_name", name)
+
+    def get_client_by_id_future(self, client_id: int) -> Future:
+        return self.submit("get_client_by_id", client_id)
+
+    def add_client_future(self, *args, **kwargs) -> Future:
+        """add or update a client and commit"""
+        return self._commit_future("add_client", *args, **kwargs)
+
+    def update_item_future(self, client: Client) -> Future:
+        """update a client and commit"""
+        return self._commit_future("update_item", client)
+
+    def delete_client_future(self, key: str) -> Future:
+        """delete a client and commit"""
+        return self._commit_future("delete_client", key)
+
+    # asyncio variants
+    async def async_sync(self):  # asyncio variant of sync, "async" itself is a keyword
+        return await self._await("sync")
+
+    async def arefresh(self) -> bool:
+        return await self._await("refresh")
+
+    async def aget_client_by_api_key(self, api_key: str) -> Optional[Client]:
+        return await self._await("get_client_by_api_key", api_key)
+
+    async def aget_clients_by_name(self, name: str) -> List[Client]:
+        return await self._await("get_clients_by_name", name)
+
+    async def aget_client_by_id(self, client_id: int) -> Optional[Client]:
+        return await self._await("get_client_by_id", client_id)
+
+    async def aadd_client(self, *args, **kwargs) -> bool:
+        return await asyncio.wrap_future(self.add_client_future(*args, **kwargs))
+
+    async def aupdate_item(self, client: Client) -> bool:
+        return await asyncio.wrap_future(self.update_item_future(client))
+
+    async def adelete_client(self, key: str) -> bool:
+        return await asyncio.wrap_future(self.delete_client_future(key))
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
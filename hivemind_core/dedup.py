@@ -0,0 +1,133 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import hashlib
+import math
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Any, Deque, Iterator, List, Mapping
+
+
+class BloomFilter:
+    """fixed size set membership with false positives, no false negatives"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))  # bits
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class DedupCache:
+    """remembers message ids for `ttl` seconds so floods are only handled once per node
+
+    at most `capacity` ids are kept exactly, the oldest are evicted first. with a bloom filter
+    evicted ids are still recognised, at the cost of rare false positives
+
+    the bloom filter is split in up to `bloom_generations` generations of `bloom_capacity` ids, a generation
+    is dropped once its newest id is older than ttl. evicted ids are recognised for the full ttl as long as
+    at most (bloom_generations - 1) * bloom_capacity ids arrive per ttl, above that rate the oldest
+    generation is dropped early and its ids may be handled again
+    """
+
+    def __init__(self, ttl: float = 60, capacity: int = 10000,
+                 bloom_capacity: int = 0, bloom_error_rate: float = 0.001, bloom_generations: int = 4):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.bloom_generations = max(2, bloom_generations)
+        self._seen: 'OrderedDict[str, float]' = OrderedDict()  # id -> expiry, insertion order is expiry order
+        self._lock = Lock()
+        # [filter, created, last add], newest last
+        self._blooms: Deque[List] = deque()
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any]) -> 'DedupCache':
+        return DedupCache(ttl=cfg.get("ttl", 60),
+                          capacity=cfg.get("capacity", 10000),
+                          bloom_capacity=cfg.get("bloom_capacity", 0),
+                          bloom_error_rate=cfg.get("bloom_error_rate", 0.001),
+                          bloom_generations=cfg.get("bloom_generations", 4))
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def __contains__(self, msg_id: str) -> bool:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._contains(msg_id)
+
+    def seen(self, msg_id: str) -> bool:
+        """record a message id
+
+        Returns:
+            True if the id was already recorded within the ttl
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if self._contains(msg_id):
+                return True
+            self._seen[msg_id] = now + self.ttl
+            while len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+            if self.bloom_capacity > 0:
+                self._bloom_add(msg_id, now)
+            return False
+
+    def _contains(self, msg_id: str) -> bool:
+        # the exact cache answers most lookups, the bloom filter is only hashed for ids it does not hold
+        if msg_id in self._seen:
+            return True
+        return any(msg_id in bloom for bloom, _, _ in self._blooms)
+
+    def _bloom_add(self, msg_id: str, now: float):
+        # a generation spans ttl / (bloom_generations - 1) seconds, so at low rates every
+        # id stays recognised for ttl with bloom_generations generations kept
+        span = self.ttl / (self.bloom_generations - 1)
+        if (not self._blooms or self._blooms[-1][0].count >= self.bloom_capacity
+                or now - self._blooms[-1][1] >= span):
+            self._blooms.append([BloomFilter(self.bloom_capacity, self.bloom_error_rate), now, now])
+            while len(self._blooms) > self.bloom_generations:
+                self._blooms.popleft()  # saturated, ids of this generation are forgotten before their ttl
+        self._blooms[-1][0].add(msg_id)
+        self._blooms[-1][2] = now
+
+    def _expire(self, now: float):
+        # called with the lock held
+        while self._seen:
+            msg_id, expires = next(iter(self._seen.items()))
+            if expires > now:
+                break
+            self._seen.popitem(last=False)
+        while self._blooms and now - self._blooms[0][2] >= self.ttl:
+            self._blooms.popleft()
@@ -0,0 +1,108 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
+
+from Cryptodome.PublicKey import RSA
+from ovos_utils.log import LOG
+from poorman_handshake import HandShake, PasswordHandShake
+
+# (envelope, secret, handshake state to copy back to the connection)
+HandshakeResult = Tuple[str, bytes, Dict[str, Any]]
+
+_KEY_CACHE: Dict[str, RSA.RsaKey] = {}  # per worker process, PEM -> parsed key
+
+
+def _import_key(key: Union[str, bytes, RSA.RsaKey]) -> RSA.RsaKey:
+    if isinstance(key, RSA.RsaKey):
+        return key
+    parsed = _KEY_CACHE.get(key)
+    if parsed is None:
+        if len(_KEY_CACHE) >= 64:
+            _KEY_CACHE.clear()
+        parsed = _KEY_CACHE[key] = RSA.import_key(key)
+    return parsed
+
+
+def handshake_from_key(private_key: Union[str, RSA.RsaKey]) -> HandShake:
+    """HandShake for an already parsed key, HandShake.__init__ would read or generate one"""
+    shake = HandShake.__new__(HandShake)
+    shake.private_key = _import_key(private_key)
+    shake.target_key = None
+    shake.secret = None
+    return shake
+
+
+def rsa_handshake(private_key: Union[str, RSA.RsaKey], pub: str) -> HandshakeResult:
+    """HandShake.generate_handshake with plain arguments, so it can run in another process"""
+    shake = handshake_from_key(private_key)
+    envelope = shake.generate_handshake(pub)
+    return envelope, shake.secret, {"secret": shake.secret}
+
+
+def password_handshake(password: str, envelope: str) -> HandshakeResult:
+    """PasswordHandShake exchange and key derivation with plain arguments, so it can run in another process"""
+    shake = PasswordHandShake(password)
+    envelope_out = shake.generate_handshake()
+    shake.receive_handshake(envelope)
+    return envelope_out, shake.secret, {"iv": shake.iv, "salt": shake.salt}
+
+
+class HandshakePool:
+    """runs handshake crypto (RSA, pbkdf2) away from the network threads
+
+    threads are enough for the C implemented primitives that release the GIL,
+    processes also parallelize the python glue around them
+    """
+
+    def __init__(self, workers: int = 4, mode: str = "thread"):
+        self.mode = mode
+        self._pems: Dict[int, Tuple[RSA.RsaKey, str]] = {}  # id(key) -> (key, PEM), keys sent to process workers
+        if mode == "process":
+            # never fork a process that is running threads
+            self._executor: Executor = ProcessPoolExecutor(max_workers=workers,
+                                                           mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hivemind-handshake")
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any]) -> Optional['HandshakePool']:
+        """pool for the 'handshake_pool' config section, None to run handshakes inline"""
+        if cfg.get("workers", 0) <= 0:
+            return None
+        return HandshakePool(workers=cfg["workers"], mode=cfg.get("mode", "thread"))
+
+    def submit(self, fn: Callable[..., HandshakeResult], *args) -> Future:
+        if self.mode == "process":
+            # parsed keys can not be pickled, workers parse and cache the PEM
+            args = tuple(self._pem(a) if isinstance(a, RSA.RsaKey) else a for a in args)
+        return self._executor.submit(fn, *args)
+
+    def _pem(self, key: RSA.RsaKey) -> str:
+        """PEM export of a key, computed once per key object"""
+        cached = self._pems.get(id(key))
+        if cached is None or cached[0] is not key:  # the reference held avoids id reuse
+            if len(self._pems) >= 64:
+                self._pems.clear()
+            cached = self._pems[id(key)] = (key, key.export_key(format="PEM").decode("utf-8"))
+        return cached[1]
+
+    def shutdown(self, wait: bool = False):
+        try:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+        except Exception as e:
+            LOG.debug(f"error shutting down handshake pool: {e}")
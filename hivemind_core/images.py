@@ -0,0 +1,124 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from ovos_utils.log import LOG
+
+from hivemind_core.scheduler import SCHEDULER, ScheduledCall
+
+try:
+    import numpy as np
+except ImportError:  # optional, pip install hivemind-core[numpy]
+    np = None
+
+
+def decode_numpy_image(bin_data: Union[bytes, memoryview],
+                       metadata: Mapping[str, Any]) -> Optional['np.ndarray']:
+    """view a NUMPY_IMAGE payload as an ndarray without copying it
+
+    the sender describes the frame with "shape" and "dtype" (default uint8) metadata,
+    the returned array is read-only and shares memory with `bin_data`
+
+    Returns:
+        None if numpy is not installed or the payload has no shape metadata
+    """
+    shape = metadata.get("shape")
+    if np is None or not shape:
+        return None
+    dtype = np.dtype(metadata.get("dtype", "uint8"))
+    shape = tuple(int(d) for d in shape)
+    expected = dtype.itemsize
+    for d in shape:
+        expected *= d
+    if expected != len(bin_data):
+        raise ValueError(f"image shape {shape} {dtype} needs {expected} bytes, got {len(bin_data)}")
+    return np.frombuffer(bin_data, dtype=dtype).reshape(shape)
+
+
+class FrameBatcher:
+    """groups decoded frames per camera so vision handlers can process them in batches
+
+    a batch is delivered once `batch_size` frames of a camera arrived or `max_delay` seconds after its first frame
+    """
+
+    def __init__(self, callback: Callable[[List[Any], str, Any], None],
+                 batch_size: int = 8, max_delay: float = 0.1):
+        self.callback = callback  # (frames, camera_id, client)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._frames: Dict[Tuple[int, str], List[Any]] = {}
+        self._clients: Dict[Tuple[int, str], Any] = {}
+        self._timers: Dict[Tuple[int, str], ScheduledCall] = {}
+        self._lock = Lock()
+        # batches due to max_delay are handled here, vision handlers are too slow for the shared scheduler thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FrameBatcher")
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any],
+                    callback: Callable[[List[Any], str, Any], None]) -> Optional['FrameBatcher']:
+        """batcher for the 'numpy_image_batch' config section, None if batching is disabled"""
+        if cfg.get("batch_size", 0) <= 1:
+            return None
+        return FrameBatcher(callback, batch_size=cfg["batch_size"], max_delay=cfg.get("max_delay", 0.1))
+
+    def add(self, frame: Any, camera_id: str, client: Any):
+        k = (id(client), camera_id)
+        with self._lock:
+            frames = self._frames.setdefault(k, [])
+            frames.append(frame)
+            self._clients[k] = client
+            if len(frames) < self.batch_size:
+                if k not in self._timers:
+                    self._timers[k] = SCHEDULER.call_later(self.max_delay, self._executor.submit, self.flush, k)
+                return
+        self.flush(k)
+
+    def flush(self, k: Tuple[int, str]):
+        with self._lock:
+            frames = self._frames.pop(k, None)
+            client = self._clients.pop(k, None)
+            timer = self._timers.pop(k, None)
+        if timer is not None:
+            timer.cancel()
+        if not frames:
+            return
+        try:
+            self.callback(frames, k[1], client)
+        except Exception as e:
+            LOG.error(f"failed to handle batch of {len(frames)} frames from camera {k[1]}: {e}")
+
+    def discard(self, client: Any):
+        """drop pending frames of a disconnected client"""
+        with self._lock:
+            keys = [k for k in self._frames if k[0] == id(client)]
+            for k in keys:
+                self._frames.pop(k, None)
+                self._clients.pop(k, None)
+                timer = self._timers.pop(k, None)
+                if timer is not None:
+                    timer.cancel()
+
+    def shutdown(self):
+        """stop delivering delayed batches, pending frames are dropped"""
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            self._frames.clear()
+            self._clients.clear()
+        self._executor.shutdown(wait=False)
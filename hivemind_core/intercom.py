@@ -0,0 +1,114 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""end to end encrypted INTERCOM payloads
+
+two payload formats are accepted
+    rsa    - {"ciphertext", "signature"}, the serialized message encrypted with RSA-OAEP,
+             limited to a couple hundred bytes by the key size
+    hybrid - {"wrapped_key", "ciphertext", "cipher", "signature"}, a random session key encrypted with RSA-OAEP
+             and the message encrypted with that key (AES-GCM or CHACHA20-POLY1305), any size
+
+senders may reuse a wrapped key for several messages, unwrapped keys are cached so RSA only runs once per key
+"""
+import hashlib
+import secrets
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+import pybase64
+from Cryptodome.PublicKey import RSA
+from poorman_handshake.asymmetric.utils import decrypt_RSA, encrypt_RSA
+
+from hivemind_bus_client.encryption import SupportedCiphers, decrypt_bin, encrypt_bin
+
+
+class IntercomCrypto:
+    """decrypts INTERCOM payloads addressed to this node"""
+
+    def __init__(self, private_key: RSA.RsaKey, cache_size: int = 128):
+        self.private_key = private_key
+        self.cache_size = cache_size
+        self._keys: 'OrderedDict[Tuple[str, bytes], bytes]' = OrderedDict()  # (sender, wrapped key digest) -> key
+        self._lock = Lock()
+
+    @staticmethod
+    def from_config(private_key: RSA.RsaKey, cfg: Mapping[str, Any]) -> 'IntercomCrypto':
+        return IntercomCrypto(private_key, cache_size=cfg.get("key_cache_size", 128))
+
+    @staticmethod
+    def is_encrypted(payload: Any) -> bool:
+        return isinstance(payload, dict) and "ciphertext" in payload
+
+    def decrypt(self, payload: Mapping[str, str], sender: str = "") -> str:
+        """
+        Returns:
+            the serialized HiveMessage
+
+        Raises:
+            ValueError: payload can not be decrypted with our key
+        """
+        ciphertext = pybase64.b64decode(payload["ciphertext"])
+        if "wrapped_key" not in payload:
+            return decrypt_RSA(self.private_key, ciphertext).decode("utf-8")
+        key = self._unwrap(pybase64.b64decode(payload["wrapped_key"]), sender)
+        cipher = payload.get("cipher") or SupportedCiphers.AES_GCM
+        return decrypt_bin(key=key, ciphertext=ciphertext, cipher=cipher).decode("utf-8")
+
+    def _unwrap(self, wrapped: bytes, sender: str) -> bytes:
+        k = (sender, hashlib.sha256(wrapped).digest())
+        with self._lock:
+            key = self._keys.get(k)
+            if key is not None:
+                self._keys.move_to_end(k)
+                return key
+        key = decrypt_RSA(self.private_key, wrapped)
+        if self.cache_size > 0:
+            with self._lock:
+                self._keys[k] = key
+                while len(self._keys) > self.cache_size:
+                    self._keys.popitem(last=False)
+        return key
+
+    def forget(self, sender: str):
+        """drop the cached keys of a sender, eg. when it disconnects"""
+        with self._lock:
+            for k in [k for k in self._keys if k[0] == sender]:
+                del self._keys[k]
+
+
+def encrypt_intercom(public_key: Union[str, RSA.RsaKey], serialized: str,
+                     signature: bytes = b"",
+                     cipher: SupportedCiphers = SupportedCiphers.AES_GCM,
+                     session_key: Optional[Tuple[bytes, bytes]] = None) -> Tuple[Dict[str, str], Tuple[bytes, bytes]]:
+    """hybrid INTERCOM payload for the node owning `public_key`
+
+    pass the (key, wrapped_key) returned in a previous call as `session_key` to skip the RSA operation,
+    the receiver will also reuse its cached key
+
+    Returns:
+        the payload and the (key, wrapped_key) session key
+    """
+    if session_key is None:
+        key = secrets.token_bytes(32)
+        session_key = (key, encrypt_RSA(public_key, key))
+    key, wrapped = session_key
+    payload = {"wrapped_key": pybase64.b64encode(wrapped).decode("utf-8"),
+               "ciphertext": pybase64.b64encode(encrypt_bin(key=key, plaintext=serialized,
+                                                            cipher=cipher)).decode("utf-8"),
+               "cipher": getattr(cipher, "value", cipher),
+               "signature": pybase64.b64encode(signature).decode("utf-8")}
+    return payload, session_key
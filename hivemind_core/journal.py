@@ -0,0 +1,161 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import json
+import os
+from tempfile import gettempdir
+from threading import Lock
+from typing import Callable, List, Optional
+
+from combo_lock import ComboLock
+from ovos_utils.log import LOG
+
+from hivemind_plugin_manager.database import AbstractDB, Client
+
+
+class ClientJournal:
+    """append-only log of client mutations, replayed on top of a database snapshot
+
+    each line is a json record, either
+        {"op": "put", "client": {...}}
+        {"op": "del", "client_id": 1, "api_key": "..."}
+
+    the journal is compacted by committing the database snapshot and truncating the log
+    """
+
+    def __init__(self, path: str, compact_entries: int = 1000, fsync: bool = False):
+        self.path = path
+        self.compact_entries = compact_entries
+        self.fsync = fsync
+        self.offset = 0  # bytes of the journal already applied to the in-memory database
+        self.entries = 0  # records in the journal since last compaction
+        self._pending: List[str] = []
+        self._pending_lock = Lock()
+        # shared with other processes using the same journal (eg. admin CLI)
+        self.lock = ComboLock(os.path.join(gettempdir(), os.path.basename(path) + ".lock"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def record_put(self, client: Client):
+        # serialize now, callers may keep mutating the Client object
+        with self._pending_lock:
+            self._pending.append(json.dumps({"op": "put", "client": client.__dict__},
+                                            ensure_ascii=False))
+
+    def record_delete(self, client: Client):
+        with self._pending_lock:
+            self._pending.append(json.dumps({"op": "del",
+                                             "client_id": client.client_id,
+                                             "api_key": client.api_key}))
+
+    def append(self) -> bool:
+        """write pending records in a single append
+
+        Returns:
+            False if other processes wrote to the journal since it was last replayed
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return True
+        data = ("\n".join(pending) + "\n").encode("utf-8")
+        with self.lock:
+            in_sync = self.size() == self.offset
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            if in_sync:
+                # only skip over our own records, foreign ones still need to be replayed
+                self.offset += len(data)
+            self.entries += len(pending)
+        return in_sync
+
+    def replay(self, db: AbstractDB, offset: Optional[int] = None) -> List[Client]:
+        """apply journal records past `offset` to the database
+
+        Returns:
+            clients that were modified, revoked placeholders for deleted clients
+        """
+        with self.lock:
+            return self._replay(db, self.offset if offset is None else offset)
+
+    def _replay(self, db: AbstractDB, offset: int) -> List[Client]:
+        changed = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        if offset == 0:
+            self.entries = 0
+        # ignore a trailing partial line, it will be read once complete
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if record["op"] == "put":
+                    client = Client.deserialize(record["client"])
+                    db.update_item(client)
+                elif record["op"] == "del":
+                    db.delete_item(Client(client_id=record["client_id"], api_key=record["api_key"]))
+                    client = Client(client_id=record["client_id"], api_key="revoked")
+                else:
+                    raise ValueError(f"unknown journal op: {record['op']}")
+            except Exception as e:
+                LOG.warning(f"skipping corrupted journal record: {e}")
+                continue
+            changed.append(client)
+            self.entries += 1
+        self.offset = offset + end
+        return changed
+
+    def needs_compaction(self) -> bool:
+        return self.compact_entries > 0 and self.entries >= self.compact_entries
+
+    def compact(self, db: AbstractDB, is_stale: Optional[Callable[[], bool]] = None) -> Optional[List[Client]]:
+        """persist the full database snapshot and truncate the journal
+
+        `is_stale` is checked with the journal lock held, compaction is skipped if it returns True,
+        ie. another process wrote a new snapshot since `db` was loaded
+
+        Returns:
+            clients modified by records from other processes, replayed before the snapshot was written,
+            None if compaction was skipped
+        """
+        with self.lock:
+            if is_stale is not None and is_stale():
+                return None
+            # pick up records appended by other processes so the snapshot includes them
+            changed = self._replay(db, self.offset)
+            if not db.commit():
+                LOG.error(f"failed to compact client journal: {self.path}")
+                return changed
+            with open(self.path, "wb") as f:
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.offset = 0
+            self.entries = 0
+        LOG.debug(f"compacted client journal: {self.path}")
+        return changed
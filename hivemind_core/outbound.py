@@ -0,0 +1,282 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from queue import SimpleQueue
+from threading import Event, Lock, Thread, current_thread, get_ident
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, Iterator, Mapping, Optional, Set, Tuple, Union
+
+from ovos_utils.log import LOG
+
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"  # discard the oldest queued message
+    DROP_TYPE = "drop_type"  # discard the oldest queued message of a droppable type, disconnect if there is none
+    DISCONNECT = "disconnect"  # give up on the client
+
+
+# (payload, is_bin, types of every message in the frame, used to match droppable_types)
+_Item = Tuple[Union[str, bytes], bool, Tuple[Tuple[str, ...], ...]]
+_DISCONNECT = object()  # queued after pending messages so the client receives them before disconnecting
+
+
+class OutboundQueue:
+    """bounded queue of encrypted payloads waiting to be written to one client
+
+    drained by the writer pool, at most one worker writes to a client at a time so order is preserved
+    """
+    BATCH = 32  # messages written per turn, then the worker goes back to the pool
+
+    def __init__(self, pool: 'OutboundWriterPool',
+                 send_msg: Callable[[Union[str, bytes], bool], None],
+                 disconnect: Callable[[], None],
+                 max_size: int = 100,
+                 overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 droppable_types: Iterable[str] = (),
+                 peer: str = "unknown"):
+        self.pool = pool
+        self.send_msg = send_msg
+        self._disconnect = disconnect
+        self.max_size = max_size
+        self.overflow = OverflowPolicy(overflow)
+        self.droppable_types: FrozenSet[str] = frozenset(droppable_types)
+        self.peer = peer
+        self.dropped = 0  # messages discarded by the overflow policy
+        self.closed = False
+        self._queue: Deque[Union[_Item, object]] = deque()
+        self._lock = Lock()
+        self._scheduled = False
+
+    @property
+    def depth(self) -> int:
+        """messages waiting to be written"""
+        return len(self._queue)
+
+    def _is_droppable(self, item) -> bool:
+        # a batch frame is only dropped if every message in it may be
+        return item is not _DISCONNECT and bool(item[2]) and all(
+            any(t in self.droppable_types for t in types) for types in item[2])
+
+    def _make_room(self, item: _Item) -> bool:
+        """apply the overflow policy, called with the lock held
+
+        Returns:
+            False if the new message should not be queued
+        """
+        if self.overflow == OverflowPolicy.DROP_OLDEST:
+            self._queue.popleft()
+            self.dropped += 1
+            return True
+        if self.overflow == OverflowPolicy.DROP_TYPE:
+            for idx, queued in enumerate(self._queue):
+                if self._is_droppable(queued):
+                    del self._queue[idx]
+                    self.dropped += 1
+                    return True
+            if self._is_droppable(item):
+                self.dropped += 1
+                return False
+        # nothing we are allowed to drop
+        LOG.warning(f"outbound queue full, disconnecting slow client: {self.peer}")
+        self.closed = True
+        self.dropped += len(self._queue) + 1
+        self._queue.clear()
+        self._queue.append(_DISCONNECT)
+        return False
+
+    def put(self, payload: Union[str, bytes], is_bin: bool, msg_types: Tuple[Tuple[str, ...], ...] = ()) -> bool:
+        """queue a payload for the writer pool
+
+        `msg_types` holds the types of each message in the payload, more than one for batch frames
+
+        Returns:
+            False if the payload was dropped
+        """
+        item = (payload, is_bin, msg_types)
+        with self._lock:
+            if self.closed:
+                return False
+            queued = len(self._queue) < self.max_size or self._make_room(item)
+            if queued:
+                self._queue.append(item)
+            self._schedule()
+        return queued
+
+    def disconnect(self):
+        """disconnect once the messages already queued have been written"""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._queue.append(_DISCONNECT)
+            self._schedule()
+
+    def _schedule(self):
+        # called with the lock held
+        if not self._scheduled:
+            self._scheduled = True
+            self.pool.submit(self._drain)
+
+    def _drain(self):
+        for _ in range(self.BATCH):
+            with self._lock:
+                if not self._queue:
+                    self._scheduled = False
+                    return
+                item = self._queue.popleft()
+            if item is _DISCONNECT:
+                with self._lock:
+                    self._queue.clear()
+                    self._scheduled = False
+                try:
+                    self._disconnect()
+                except Exception as e:
+                    LOG.error(f"failed to disconnect {self.peer}: {e}")
+                return
+            try:
+                with self.pool.writing(self):
+                    self.send_msg(item[0], item[1])
+            except Exception as e:
+                LOG.error(f"failed to send message to {self.peer}: {e}")
+        # yield the worker so other clients get a turn
+        self.pool.submit(self._drain)
+
+    def abandon(self):
+        """give up on a client whose write is blocked, called by the pool watchdog"""
+        with self._lock:
+            if self.closed and not self._queue:
+                return  # already disconnected
+            self.closed = True
+            self.dropped += len(self._queue)
+            self._queue.clear()
+        LOG.warning(f"write blocked for more than {self.pool.send_timeout}s, disconnecting slow client: {self.peer}")
+        try:
+            self._disconnect()
+        except Exception as e:
+            LOG.error(f"failed to disconnect {self.peer}: {e}")
+
+
+class OutboundWriterPool:
+    """threads writing queued payloads to clients, a slow client only ever holds one of them
+
+    a write blocked for more than `send_timeout` seconds disconnects its client and a replacement thread
+    takes over, the blocked thread exits once the write returns. slow clients never starve the others
+    """
+
+    def __init__(self, workers: int = 4, max_size: int = 100,
+                 overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 droppable_types: Iterable[str] = (),
+                 send_timeout: float = 10):
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.overflow = OverflowPolicy(overflow)
+        self.droppable_types = tuple(droppable_types)
+        self.send_timeout = send_timeout
+        self._tasks: 'SimpleQueue[Optional[Callable[[], None]]]' = SimpleQueue()
+        self._lock = Lock()
+        self._threads: Set[Thread] = set()
+        self._writing: Dict[int, Tuple[float, OutboundQueue]] = {}  # thread ident -> (write start, queue)
+        self._replaced: Set[int] = set()  # blocked threads that have been replaced
+        self._stopped = Event()
+        for _ in range(self.workers):
+            self._spawn()
+        if send_timeout > 0:
+            Thread(target=self._watchdog, name="hivemind-writer-watchdog", daemon=True).start()
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any]) -> Optional['OutboundWriterPool']:
+        """writer pool for the 'outbound_queue' config section, None if queueing is disabled"""
+        if cfg.get("max_size", 0) <= 0:
+            return None
+        return OutboundWriterPool(workers=cfg.get("workers", 4),
+                                  max_size=cfg["max_size"],
+                                  overflow=cfg.get("overflow", OverflowPolicy.DROP_OLDEST),
+                                  droppable_types=cfg.get("droppable_types") or (),
+                                  send_timeout=cfg.get("send_timeout", 10))
+
+    def create_queue(self, send_msg: Callable[[Union[str, bytes], bool], None],
+                     disconnect: Callable[[], None], peer: str = "unknown") -> OutboundQueue:
+        return OutboundQueue(self, send_msg, disconnect,
+                             max_size=self.max_size,
+                             overflow=self.overflow,
+                             droppable_types=self.droppable_types,
+                             peer=peer)
+
+    def submit(self, fn: Callable[[], None]):
+        if self._stopped.is_set():
+            LOG.debug("writer pool is shut down, dropping outbound message")
+            return
+        self._tasks.put(fn)
+
+    def _spawn(self):
+        thread = Thread(target=self._work, name="hivemind-writer", daemon=True)
+        with self._lock:
+            self._threads.add(thread)
+        thread.start()
+
+    def _work(self):
+        me = get_ident()
+        while True:
+            fn = self._tasks.get()
+            if fn is None:
+                break
+            try:
+                fn()
+            except Exception as e:
+                LOG.error(f"outbound writer error: {e}")
+            with self._lock:
+                if me in self._replaced:  # blocked for too long, a new thread took our place
+                    self._replaced.discard(me)
+                    break
+        with self._lock:
+            self._threads.discard(current_thread())
+
+    @contextmanager
+    def writing(self, queue: OutboundQueue) -> Iterator[None]:
+        """track a write so the watchdog can detect it blocking"""
+        me = get_ident()
+        with self._lock:
+            self._writing[me] = (time.monotonic(), queue)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._writing.pop(me, None)
+
+    def _watchdog(self):
+        while not self._stopped.wait(self.send_timeout / 4):
+            now = time.monotonic()
+            with self._lock:
+                blocked = [(ident, queue) for ident, (since, queue) in self._writing.items()
+                           if now - since > self.send_timeout and ident not in self._replaced]
+                self._replaced.update(ident for ident, _ in blocked)
+            for _, queue in blocked:
+                self._spawn()
+                queue.abandon()
+
+    def shutdown(self, wait: bool = False):
+        """stop accepting messages, already queued writes still run"""
+        self._stopped.set()
+        with self._lock:
+            threads = list(self._threads)
+        for _ in threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in threads:
+                if thread.ident not in self._replaced:
+                    thread.join()
@@ -15,31 +15,42 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import dataclasses
 import json
+import secrets
 import time
 import uuid
 from dataclasses import dataclass, field
 from enum import Enum, IntEnum
-from typing import Union, List, Optional, Callable, Literal
+from threading import Lock, RLock
+from typing import Union, List, Optional, Callable, Literal, FrozenSet, Tuple, Dict, Mapping, Any, Iterable, BinaryIO
 
 import pybase64
+from Cryptodome.PublicKey import RSA
 from ovos_bus_client import MessageBusClient
 from ovos_bus_client.message import Message
 from ovos_bus_client.session import Session
 from ovos_utils.fakebus import FakeBus
 from ovos_utils.log import LOG
-from hivemind_core.config import get_server_config
+from hivemind_core.config import get_config_snapshot
 from hivemind_bus_client.identity import NodeIdentity
 from hivemind_bus_client.message import HiveMessage, HiveMessageType, HiveMindBinaryPayloadType
 from hivemind_bus_client.serialization import decode_bitstring, get_bitstring
 from hivemind_bus_client.encryption import (SupportedEncodings, SupportedCiphers,
                                             decrypt_from_json, encrypt_as_json,
-                                            decrypt_bin, encrypt_bin,
-                                            _norm_encoding, _norm_cipher)
-from hivemind_core.database import ClientDatabase
+                                            decrypt_bin, encrypt_bin, optimal_ciphers)
+from hivemind_core.compression import (CompressionSettings, DecompressionError, SupportedCompression,
+                                       compress, decompress, pack_bin, unpack_bin)
+from hivemind_core.dedup import DedupCache
+from hivemind_core.database import ClientDatabase, PresenceBuffer, AsyncClientDatabase
+from hivemind_core.outbound import OutboundQueue, OutboundWriterPool
+from hivemind_core.scheduler import SCHEDULER, ScheduledCall
+from hivemind_core.handshake import HandshakePool, handshake_from_key, password_handshake, rsa_handshake
+from hivemind_core.intercom import IntercomCrypto
+from hivemind_core.images import FrameBatcher, decode_numpy_image
+from hivemind_core.tickets import SessionTicket, TicketIssuer, derive_resumption_key
+from hivemind_core.streams import SpoolBudget, SpooledPayload, StreamError, StreamReceiver, iter_stream_messages
 from hivemind_bus_client.hive_map import HiveMapper
 from hivemind_plugin_manager.protocols import AgentProtocol, BinaryDataHandlerProtocol, ClientCallbacks
 from poorman_handshake import HandShake, PasswordHandShake
-from poorman_handshake.asymmetric.utils import decrypt_RSA, load_RSA_key
 
 
 class ProtocolVersion(IntEnum):
@@ -67,6 +78,377 @@ class HiveMindNodeType(str, Enum):
     # but receiving connections
 
 
+# cheapest first, C implemented base64 and hex vs pure python base91/z85
+ENCODING_COST = [SupportedEncodings.JSON_B64, SupportedEncodings.JSON_URLSAFE_B64,
+                 SupportedEncodings.JSON_HEX, SupportedEncodings.JSON_B32,
+                 SupportedEncodings.JSON_Z85P, SupportedEncodings.JSON_Z85B,
+                 SupportedEncodings.JSON_B91]
+
+
+@dataclass
+class AdaptiveBinarization:
+    """per message choice between the bitstring and json wire formats for clients that support both
+
+    encrypted wire bytes per json byte are measured for both formats, separately per message size class
+    (powers of two) since fixed envelope and header overheads weigh more on small messages.
+    every `probe_interval` messages of a size class the losing format is sent once more to re-measure it
+    """
+    min_size: int = 256  # serialized json smaller than this is always sent as json
+    min_saving: float = 0.1  # binary must be measured this much smaller to pay for the extra encode
+    probe_interval: int = 32  # messages of a size class between re-measurements of the losing format, 0 never
+    # statistics, reported per client
+    json_messages: int = 0
+    json_bytes: int = 0
+    json_seconds: float = 0.0
+    bin_messages: int = 0
+    bin_bytes: int = 0
+    bin_seconds: float = 0.0
+    # size class -> [bitstring ratio, json ratio, messages since the losing format was measured]
+    # ratios are moving averages of wire bytes / json bytes, None until measured
+    _classes: Dict[int, List[Any]] = field(default_factory=dict, init=False, repr=False)
+    # [wire bytes, json bytes] of the messages above min_size, bitstring then json
+    _measured: List[List[int]] = field(default_factory=lambda: [[0, 0], [0, 0]], init=False, repr=False)
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any]) -> Optional['AdaptiveBinarization']:
+        if not cfg.get("enabled", False):
+            return None
+        return AdaptiveBinarization(min_size=cfg.get("min_size", 256),
+                                    min_saving=cfg.get("min_saving", 0.1),
+                                    probe_interval=cfg.get("probe_interval", 32))
+
+    def choose_binary(self, json_size: int) -> bool:
+        if json_size < self.min_size:
+            return False
+        with self._lock:
+            size_class = self._classes.setdefault(json_size.bit_length(), [None, None, 0])
+            bin_ratio, json_ratio, _ = size_class
+            if bin_ratio is None or json_ratio is None:
+                return bin_ratio is None  # measure both formats first
+            binary = bin_ratio <= json_ratio * (1 - self.min_saving)
+            size_class[2] += 1
+            if self.probe_interval > 0 and size_class[2] >= self.probe_interval:
+                size_class[2] = 0
+                return not binary
+            return binary
+
+    def record(self, binary: bool, json_size: int, wire_size: int, seconds: float):
+        with self._lock:
+            if binary:
+                self.bin_messages += 1
+                self.bin_bytes += wire_size
+                self.bin_seconds += seconds
+            else:
+                self.json_messages += 1
+                self.json_bytes += wire_size
+                self.json_seconds += seconds
+            if json_size < self.min_size:
+                return
+            idx = 0 if binary else 1
+            self._measured[idx][0] += wire_size
+            self._measured[idx][1] += json_size
+            size_class = self._classes.setdefault(json_size.bit_length(), [None, None, 0])
+            ratio = wire_size / json_size
+            size_class[idx] = ratio if size_class[idx] is None else 0.8 * size_class[idx] + 0.2 * ratio
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (bin_wire, bin_json), (json_wire, json_json) = self._measured
+            return {"json_messages": self.json_messages, "json_bytes": self.json_bytes,
+                    "json_seconds": self.json_seconds,
+                    "bin_messages": self.bin_messages, "bin_bytes": self.bin_bytes,
+                    "bin_seconds": self.bin_seconds,
+                    # wire bytes / json bytes of the messages above min_size, None until one was sent
+                    "bin_ratio": bin_wire / bin_json if bin_json else None,
+                    "json_ratio": json_wire / json_json if json_json else None}
+
+
+@dataclass(frozen=True)
+class CryptoNegotiation:
+    """allowed ciphers/encodings precomputed from the server config, used to answer handshakes"""
+    encodings: Tuple[SupportedEncodings, ...] = tuple(SupportedEncodings)  # server preference order
+    ciphers: Tuple[SupportedCiphers, ...] = (SupportedCiphers.AES_GCM,)
+    # ignore client preference and pick the cheapest allowed option the client supports
+    prefer_cheapest: bool = False
+    # value -> rank, lower is cheaper, only contains allowed options
+    encoding_rank: Mapping[str, int] = field(default_factory=dict)
+    cipher_rank: Mapping[str, int] = field(default_factory=dict)
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any]) -> 'CryptoNegotiation':
+        encodings = CryptoNegotiation._parse(SupportedEncodings, cfg.get("allowed_encodings")) \
+                    or tuple(SupportedEncodings)
+        ciphers = CryptoNegotiation._parse(SupportedCiphers, cfg.get("allowed_ciphers")) \
+                  or (SupportedCiphers.AES_GCM,)
+        prefer_cheapest = bool(cfg.get("prefer_cheapest_crypto", False))
+        # optimal_ciphers inspects the cpu, only pay for it when needed
+        cipher_cost = optimal_ciphers() if prefer_cheapest else list(ciphers)
+        return CryptoNegotiation(encodings=encodings,
+                                 ciphers=ciphers,
+                                 prefer_cheapest=prefer_cheapest,
+                                 encoding_rank={e.value: CryptoNegotiation._cost(ENCODING_COST, e)
+                                                for e in encodings},
+                                 cipher_rank={c.value: CryptoNegotiation._cost(cipher_cost, c)
+                                              for c in ciphers})
+
+    @staticmethod
+    def _cost(cost: List, option) -> int:
+        return cost.index(option) if option in cost else len(cost)
+
+    @staticmethod
+    def _parse(enum_cls, values: Optional[Iterable[str]]) -> tuple:
+        parsed = []
+        for v in values or []:
+            try:
+                parsed.append(enum_cls(v))
+            except ValueError:
+                LOG.warning(f"ignoring invalid {enum_cls.__name__} in config: {v}")
+        return tuple(parsed)
+
+    @staticmethod
+    def _select(options: Iterable[str], rank: Mapping[str, int], prefer_cheapest: bool) -> Optional[str]:
+        best = None
+        for o in options:
+            o = getattr(o, "value", o)  # str enums do not hash like their value
+            if o not in rank:
+                continue
+            if not prefer_cheapest:
+                return o  # first allowed entry in client preference order
+            if best is None or rank[o] < rank[best]:
+                best = o
+        return best
+
+    def select_encoding(self, client_encodings: Iterable[str]) -> Optional[SupportedEncodings]:
+        e = self._select(client_encodings, self.encoding_rank, self.prefer_cheapest)
+        return SupportedEncodings(e) if e else None
+
+    def select_cipher(self, client_ciphers: Iterable[str]) -> Optional[SupportedCiphers]:
+        c = self._select(client_ciphers, self.cipher_rank, self.prefer_cheapest)
+        return SupportedCiphers(c) if c else None
+
+
+_negotiation: Tuple[Optional[Mapping[str, Any]], Optional[CryptoNegotiation]] = (None, None)
+
+
+def get_crypto_negotiation() -> CryptoNegotiation:
+    """negotiation tables for the current config snapshot, rebuilt only when the config reloads"""
+    global _negotiation
+    cfg = get_config_snapshot()
+    cached_cfg, negotiation = _negotiation
+    if cached_cfg is not cfg:
+        negotiation = CryptoNegotiation.from_config(cfg)
+        _negotiation = (cfg, negotiation)
+    return negotiation
+
+
+@dataclass(frozen=True)
+class ClientPolicy:
+    """immutable snapshot of a client's permissions, compiled once per database change"""
+    allowed_types: FrozenSet[str] = frozenset()
+    msg_blacklist: FrozenSet[str] = frozenset()
+    skill_blacklist: Tuple[str, ...] = ()
+    intent_blacklist: Tuple[str, ...] = ()
+    # (kind, session blacklist) -> merged blacklist, sessions rarely change so this stays tiny
+    _merged: Dict[Tuple[str, Tuple[str, ...]], Tuple[str, ...]] = field(default_factory=dict,
+                                                                         compare=False, repr=False)
+
+    @staticmethod
+    def compile(client: 'HiveMindClientConnection') -> 'ClientPolicy':
+        return ClientPolicy(allowed_types=frozenset(client.allowed_types or []),
+                            msg_blacklist=frozenset(client.msg_blacklist or []),
+                            skill_blacklist=tuple(client.skill_blacklist or []),
+                            intent_blacklist=tuple(client.intent_blacklist or []))
+
+    def _merge(self, kind: str, session_blacklist: List[str], blacklist: Tuple[str, ...]) -> List[str]:
+        key = (kind, tuple(session_blacklist))
+        merged = self._merged.get(key)
+        if merged is None:
+            seen = set(session_blacklist)
+            merged = key[1] + tuple(s for s in blacklist if s not in seen)
+            if len(self._merged) < 32:
+                self._merged[key] = merged
+        return list(merged)
+
+    def merge_skill_blacklist(self, session_blacklist: List[str]) -> List[str]:
+        """session blacklisted_skills extended with the client blacklist"""
+        return self._merge("skills", session_blacklist, self.skill_blacklist)
+
+    def merge_intent_blacklist(self, session_blacklist: List[str]) -> List[str]:
+        """session blacklisted_intents extended with the client blacklist"""
+        return self._merge("intents", session_blacklist, self.intent_blacklist)
+
+
+# bus message used to hand the broadcast group key to members over their own session
+GROUP_KEY_MESSAGE = "hive.group_key"
+
+
+# upper bound of a bitstring header: padding, flags, version, type, 255 bytes of metadata, binary type
+_BITSTRING_HEADER_MAX = 264
+
+
+def decode_binary_frame(data: Union[bytes, memoryview], zero_copy: bool = False) -> HiveMessage:
+    """decode a bitstring frame
+
+    with zero_copy the payload of BINARY messages is a memoryview slice of `data`,
+    receivers that keep it beyond the handler call must copy it with bytes()
+    """
+    if not zero_copy or len(data) <= _BITSTRING_HEADER_MAX:
+        return decode_bitstring(bytes(data))
+    view = memoryview(data)
+    # the header is padded to a whole number of bytes, decoding a prefix tells us where the payload starts
+    head = decode_bitstring(bytes(view[:_BITSTRING_HEADER_MAX]))
+    if head.msg_type != HiveMessageType.BINARY:
+        return decode_bitstring(bytes(data))
+    # HiveMessage only accepts bytes, set the view after construction
+    head._payload = view[_BITSTRING_HEADER_MAX - len(head.payload):]
+    return head
+
+
+# json frame carrying several HiveMessages, only sent to clients that negotiated it during handshake
+BATCH_MSG_TYPE = "batch"
+
+
+class HiveMessageBatch(list):
+    """HiveMessages received in a single batch frame"""
+    msg_type = BATCH_MSG_TYPE
+
+
+@dataclass(frozen=True)
+class GroupKey:
+    """a generation of the broadcast group key"""
+    key: str
+    key_id: int
+
+
+class BroadcastGroup:
+    """shared key used to encrypt BROADCAST/PROPAGATE fan-out once for every member
+
+    the key is rotated before the first fan-out that follows a membership change, departed clients can not
+    read new traffic and new clients can not read old traffic. a burst of joins and leaves (eg. a reconnect
+    storm) costs a single rotation sent to every member instead of one per change
+    """
+
+    def __init__(self, distribute: Optional[Callable[[GroupKey, List['HiveMindClientConnection']], None]] = None):
+        self.current: Optional[GroupKey] = None
+        self.distribute = distribute  # sends a rotated key to the members
+        self._members: List['HiveMindClientConnection'] = []
+        self._changed = False  # membership changed since the last rotation
+        self._lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def join(self, client: 'HiveMindClientConnection'):
+        """add a member, the key is rotated on the next fan-out"""
+        with self._lock:
+            if not any(m is client for m in self._members):
+                self._members.append(client)
+                self._changed = True
+
+    def leave(self, client: 'HiveMindClientConnection') -> bool:
+        """remove a member, the key is rotated on the next fan-out
+
+        Returns:
+            False if the client was not a member
+        """
+        with self._lock:
+            members = [m for m in self._members if m is not client]
+            if len(members) == len(self._members):
+                return False
+            self._members = members
+            if not members:
+                self.current = None
+            self._changed = bool(members)
+            return True
+
+    def key(self) -> Optional[GroupKey]:
+        """key to encrypt the next fan-out with, rotated and distributed first if membership changed
+
+        distribution runs under the lock, members always receive key ids in increasing order
+        """
+        with self._lock:
+            if self._changed:
+                self._changed = False
+                key_id = self.current.key_id + 1 if self.current else 0
+                # 32 ascii chars, a valid key for every supported cipher
+                self.current = GroupKey(key=secrets.token_hex(16), key_id=key_id)
+                if self.distribute is not None:
+                    self.distribute(self.current, list(self._members))
+            return self.current
+
+
+def _b64_compress(plaintext: str, settings: CompressionSettings) -> str:
+    # the json envelope helpers only handle text plaintexts
+    return pybase64.b64encode(compress(plaintext.encode("utf-8"), settings.algo, settings.level)).decode("utf-8")
+
+
+@dataclass
+class WireMessage:
+    """a HiveMessage with its plaintext wire formats cached
+
+    a fan-out shares one WireMessage between all peers, so json / bitstring serialization
+    happens at most once per format and only encryption runs per client
+    """
+    message: HiveMessage
+    group: Optional[GroupKey] = None  # group key generation current when the fan-out started
+    _json: Optional[str] = field(default=None, init=False, repr=False)
+    _bits: Optional[bytes] = field(default=None, init=False, repr=False)
+    _group_ciphertexts: Dict[Tuple[str, str], str] = field(default_factory=dict, init=False, repr=False)
+    _compressed: Dict[Tuple[str, CompressionSettings], bytes] = field(default_factory=dict, init=False, repr=False)
+
+    @property
+    def msg_type(self) -> HiveMessageType:
+        return self.message.msg_type
+
+    @property
+    def payload_type(self) -> Optional[str]:
+        """ovos message_type carried by this message, used for blacklisting"""
+        if self.message.msg_type == HiveMessageType.BINARY:
+            return None
+        if isinstance(self.message.payload, dict):
+            return self.message.payload.get("type")
+        return self.message.payload.msg_type
+
+    def as_json(self) -> str:
+        if self._json is None:
+            self._json = self.message.serialize()
+        return self._json
+
+    def as_bytes(self) -> bytes:
+        if self._bits is None:
+            self._bits = get_bitstring(hive_type=self.message.msg_type,
+                                       payload=self.message.payload,
+                                       hivemeta=self.message.metadata,
+                                       binary_type=self.message.bin_type).bytes
+        return self._bits
+
+    def compressed_json(self, settings: CompressionSettings) -> str:
+        """compressed json, base64 encoded so it can be encrypted into a json envelope"""
+        k = ("json", settings)
+        if k not in self._compressed:
+            self._compressed[k] = _b64_compress(self.as_json(), settings)
+        return self._compressed[k]
+
+    def packed_bytes(self, settings: CompressionSettings) -> bytes:
+        """bitstring with the compression header for clients that negotiated compression"""
+        k = ("bin", settings)
+        if k not in self._compressed:
+            self._compressed[k] = pack_bin(self.as_bytes(), settings)
+        return self._compressed[k]
+
+    def group_ciphertext(self, cipher: SupportedCiphers, encoding: SupportedEncodings) -> str:
+        """json payload encrypted once with the group key, shared by every member using this cipher/encoding"""
+        k = (getattr(cipher, "value", cipher), getattr(encoding, "value", encoding))
+        if k not in self._group_ciphertexts:
+            envelope = json.loads(encrypt_as_json(key=self.group.key, plaintext=self.as_json(),
+                                                  cipher=cipher, encoding=encoding))
+            envelope["group_key_id"] = self.group.key_id  # tells members to decrypt with the group key
+            self._group_ciphertexts[k] = json.dumps(envelope)
+        return self._group_ciphertexts[k]
+
+
 @dataclass
 class HiveMindClientConnection:
     """represents a connection to the hivemind listener"""
@@ -77,7 +459,7 @@ class HiveMindClientConnection:
     sess: Session = dataclasses.field(default_factory=Session)  # unique session per client
     name: str = "AnonClient"
     node_type: HiveMindNodeType = HiveMindNodeType.CANDIDATE_NODE
-    handshake: Optional[HandShake] = None
+    handshake: Optional[HandShake] = None  # created when the client starts a RSA handshake
     pswd_handshake: Optional[PasswordHandShake] = None
 
     crypto_key: Optional[str] = None
@@ -101,6 +483,19 @@ class HiveMindClientConnection:
     can_propagate: bool = True
     is_admin: bool = False
     last_seen: float = -1
+    db_generation: int = -1  # ClientDatabase.generation when permissions were last loaded
+    group_key_id: int = -1  # BroadcastGroup key generation this client holds, -1 if not a member
+    policy: Optional[ClientPolicy] = field(default=None, init=False, repr=False)  # compiled permissions
+    outbound: Optional[OutboundQueue] = field(default=None, init=False, repr=False)  # None sends synchronously
+    compression: Optional[CompressionSettings] = None  # negotiated during handshake
+    adaptive: Optional[AdaptiveBinarization] = None  # per message format choice for binarize clients
+    zero_copy: bool = False  # binary handlers receive memoryview slices of the decrypted frame
+    streams: Optional[StreamReceiver] = field(default=None, init=False, repr=False)  # incoming chunked transfers
+    batch_window: float = 0  # seconds to collect outbound messages into one frame, 0 if not negotiated
+    batch_max: int = 32  # messages per batch frame
+    _batch: List[Tuple[str, Tuple[str, ...]]] = field(default_factory=list, init=False, repr=False)
+    _batch_lock: RLock = field(default_factory=RLock, init=False, repr=False)
+    _batch_timer: Optional[ScheduledCall] = field(default=None, init=False, repr=False)
 
     hm_protocol: Optional['HiveMindListenerProtocol'] = None
 
@@ -108,7 +503,22 @@ class HiveMindClientConnection:
     encoding: Literal[SupportedEncodings] = SupportedEncodings.JSON_HEX
 
     def __post_init__(self):
-        self.handshake = self.handshake or HandShake(self.hm_protocol.identity.private_key)
+        self.zero_copy = self.zero_copy or getattr(self.hm_protocol, "zero_copy_binary", False)
+        writers = getattr(self.hm_protocol, "writers", None)
+        if writers is not None:
+            self.outbound = writers.create_queue(self.send_msg, self.disconnect, peer=self.name)
+            # disconnect only after already queued messages (eg. an error reply) were written
+            self.disconnect = self.outbound.disconnect
+
+    @property
+    def queue_depth(self) -> int:
+        """messages waiting in the outbound queue"""
+        return self.outbound.depth if self.outbound is not None else 0
+
+    @property
+    def wire_stats(self) -> Dict[str, Any]:
+        """wire format statistics, only collected for clients in adaptive binarization mode"""
+        return self.adaptive.stats if self.adaptive is not None else {}
 
     @property
     def peer(self) -> str:
@@ -116,76 +526,173 @@ class HiveMindClientConnection:
         # this is how ovos refers to connected nodes in message.context
         return f"{self.name}::{self.sess.session_id}"
 
-    def send(self, message: HiveMessage):
-        is_bin = message.msg_type == HiveMessageType.BINARY
+    def compile_policy(self) -> ClientPolicy:
+        """snapshot the current permission lists, call after changing them"""
+        policy = ClientPolicy.compile(self)
+        if policy != self.policy:  # keep the old snapshot and its merge cache if nothing changed
+            self.policy = policy
+        return self.policy
+
+    def send(self, message: Union[HiveMessage, WireMessage]):
+        """send a message to this client
+
+        pass a WireMessage to reuse plaintext serialization across several clients
+        """
+        wire = message if isinstance(message, WireMessage) else WireMessage(message)
+        is_bin = wire.msg_type == HiveMessageType.BINARY
         # TODO some cleaning around HiveMessage
         if not is_bin:
-            if isinstance(message.payload, dict):
-                _msg_type = message.payload.get("type")
-            else:
-                _msg_type = message.payload.msg_type
-
-            if _msg_type in self.msg_blacklist:
+            _msg_type = wire.payload_type
+            if _msg_type in (self.policy or self.compile_policy()).msg_blacklist:
                 LOG.debug(
                     f"message type {_msg_type} is blacklisted for {self.peer}"
                 )
                 return
-            elif message.msg_type == HiveMessageType.BUS:
+            elif wire.msg_type == HiveMessageType.BUS:
                 LOG.debug(f"mycroft_type {_msg_type}")
 
-        LOG.debug(f"sending to {self.peer}: {message.msg_type}")
+        LOG.debug(f"sending to {self.peer}: {wire.msg_type}")
 
-        if self.crypto_key and message.msg_type not in [
+        encrypt = self.crypto_key and wire.msg_type not in [
             HiveMessageType.HANDSHAKE,
             HiveMessageType.HELLO,
-        ]:
-            if self.binarize or is_bin:
-                payload = get_bitstring(hive_type=message.msg_type,
-                                        payload=message.payload,
-                                        hivemeta=message.metadata,
-                                        binary_type=message.bin_type).bytes
-                LOG.debug(f"unencrypted binary payload size: {len(payload)} bytes")
-                payload = encrypt_bin(key=self.crypto_key, plaintext=payload, cipher=self.cipher)
+        ]
+        group = wire.group is not None and wire.group.key_id == self.group_key_id
+        if self.batch_window <= 0:
+            self._send(wire, is_bin, encrypt, group)
+            return
+        with self._batch_lock:
+            if encrypt and not group and not (self.binarize or is_bin):
+                self._batch.append((wire.as_json(), (wire.msg_type.value, wire.payload_type or "")))
+                if len(self._batch) >= self.batch_max:
+                    self.flush_batch()
+                elif self._batch_timer is None:
+                    self._batch_timer = SCHEDULER.call_later(self.batch_window, self.flush_batch)
+            else:
+                # frames that can not be batched must not overtake the pending batch
+                self.flush_batch()
+                self._send(wire, is_bin, encrypt, group)
+
+    def send_stream(self, file: BinaryIO, bin_type: HiveMindBinaryPayloadType,
+                    metadata: Optional[Dict[str, Any]] = None, chunk_size: int = 64 * 1024):
+        """send a FILE or TTS_AUDIO payload in chunks, without loading the whole file in memory"""
+        for message in iter_stream_messages(file, bin_type, metadata, chunk_size):
+            self.send(message)
+
+    def flush_batch(self):
+        """send collected messages as a single encrypted frame"""
+        with self._batch_lock:
+            pending, self._batch = self._batch, []
+            if self._batch_timer is not None:
+                self._batch_timer.cancel()
+                self._batch_timer = None
+            if not pending:
+                return
+            if len(pending) == 1:
+                plaintext = pending[0][0]
+            else:
+                # the entries are already serialized HiveMessages, join them without re-parsing
+                plaintext = f'{{"msg_type": "{BATCH_MSG_TYPE}", "payload": [{", ".join(p for p, _ in pending)}]}}'
+            LOG.debug(f"sending batch of {len(pending)} messages to {self.peer}")
+            payload = self._encrypt_json(plaintext)
+            self._deliver(payload, False, tuple(types for _, types in pending))
+
+    def _send(self, wire: WireMessage, is_bin: bool, encrypt: bool, group: bool):
+        if encrypt:
+            if group and not (self.binarize or is_bin):
+                payload = wire.group_ciphertext(self.cipher, self.encoding)
+            elif is_bin or (self.binarize and self.adaptive is None):
+                payload = self._encrypt_bin(wire)
                 is_bin = True
+            elif self.binarize:
+                # adaptive, large payloads get the compact bitstring, tiny ones skip its overhead
+                start = time.perf_counter()
+                json_size = len(wire.as_json())
+                is_bin = self.adaptive.choose_binary(json_size)
+                payload = self._encrypt_bin(wire) if is_bin else self._encrypt_json(wire.as_json(), wire)
+                self.adaptive.record(is_bin, json_size, len(payload), time.perf_counter() - start)
             else:
-                LOG.debug(f"unencrypted payload size: {len(message.payload.serialize())} bytes")
-                payload = encrypt_as_json(
-                    key=self.crypto_key, plaintext=message.serialize(),
-                    cipher=self.cipher, encoding=self.encoding
-                )  # json string
+                payload = wire.as_json()
+                LOG.debug(f"unencrypted payload size: {len(payload)} bytes")
+                payload = self._encrypt_json(payload, wire)  # json string
             LOG.debug(f"encrypted payload size: {len(payload)} bytes")
         else:
-            payload = message.serialize()
+            payload = wire.as_json()
             LOG.debug(f"sent unencrypted!")
 
-        self.send_msg(payload, is_bin)
+        self._deliver(payload, is_bin, ((wire.msg_type.value, wire.payload_type or ""),))
+
+    def _encrypt_bin(self, wire: WireMessage) -> bytes:
+        payload = wire.as_bytes()
+        LOG.debug(f"unencrypted binary payload size: {len(payload)} bytes")
+        if self.compression is not None:
+            payload = wire.packed_bytes(self.compression)
+        return encrypt_bin(key=self.crypto_key, plaintext=payload, cipher=self.cipher)
+
+    def _encrypt_json(self, plaintext: str, wire: Optional[WireMessage] = None) -> str:
+        """json envelope for plaintext, compressed first if negotiated and above the threshold"""
+        settings = self.compression
+        if settings is None or len(plaintext) < settings.threshold:
+            return encrypt_as_json(key=self.crypto_key, plaintext=plaintext,
+                                   cipher=self.cipher, encoding=self.encoding)
+        data = wire.compressed_json(settings) if wire is not None else _b64_compress(plaintext, settings)
+        LOG.debug(f"compressed payload size: {len(data)} bytes")
+        envelope = json.loads(encrypt_as_json(key=self.crypto_key, plaintext=data,
+                                              cipher=self.cipher, encoding=self.encoding))
+        envelope["compression"] = settings.algo.value  # tell the receiver to decompress after decrypting
+        return json.dumps(envelope)
+
+    def _decrypt_compressed(self, envelope: Dict[str, str]) -> str:
+        if self.compression is None:
+            raise DecompressionError("compression was not negotiated")
+        algo = SupportedCompression(envelope["compression"])
+        data = decrypt_from_json(key=self.crypto_key, ciphertext_json=envelope,
+                                 encoding=self.encoding, cipher=self.cipher)
+        return decompress(pybase64.b64decode(data), algo, self.compression.max_size).decode("utf-8")
+
+    def _deliver(self, payload: Union[str, bytes], is_bin: bool, msg_types: Tuple[Tuple[str, ...], ...]):
+        if self.outbound is not None:
+            # a slow client only fills its own queue, it never blocks the caller
+            self.outbound.put(payload, is_bin, msg_types)
+        else:
+            self.send_msg(payload, is_bin)
 
-    def decode(self, payload: str) -> HiveMessage:
+    def decode(self, payload: str) -> Union[HiveMessage, HiveMessageBatch]:
         if self.crypto_key:
             # handle binary encryption
             if isinstance(payload, bytes):
                 payload = decrypt_bin(key=self.crypto_key, ciphertext=payload,
                                       cipher=self.cipher)
+                if self.compression is not None:
+                    payload, _ = unpack_bin(payload, self.compression.max_size)
             # handle json encryption
             elif "ciphertext" in payload:
-                payload = decrypt_from_json(key=self.crypto_key, ciphertext_json=payload,
-                                            encoding=self.encoding, cipher=self.cipher)
+                envelope = json.loads(payload)
+                if "compression" in envelope:
+                    payload = self._decrypt_compressed(envelope)
+                else:
+                    payload = decrypt_from_json(key=self.crypto_key, ciphertext_json=envelope,
+                                                encoding=self.encoding, cipher=self.cipher)
             else:
                 LOG.warning("Message was unencrypted")
                 # TODO - some error if crypto is required
         else:
             pass  # TODO - reject anything except HELLO and HANDSHAKE
 
-        if isinstance(payload, bytes):
-            return decode_bitstring(payload)
+        if isinstance(payload, (bytes, memoryview)):
+            return decode_binary_frame(payload, self.zero_copy)
         elif isinstance(payload, str):
             payload = json.loads(payload)
+        if payload.get("msg_type") == BATCH_MSG_TYPE:
+            if self.batch_window <= 0:
+                raise ValueError("batch frames were not negotiated")
+            return HiveMessageBatch(HiveMessage(**m) for m in payload["payload"])
         return HiveMessage(**payload)
 
     def authorize(self, message: Message) -> bool:
         """parse the message being injected into ovos-core bus
         if this client is not authorized to inject it return False"""
-        if message.msg_type not in self.allowed_types:
+        if message.msg_type not in (self.policy or self.compile_policy()).allowed_types:
             return False
 
         # TODO check intent / skill that will trigger
@@ -220,7 +727,27 @@ class HiveMindListenerProtocol:
 
     def __post_init__(self):
         self.clients = {}
-        self._seen_flood_ids: set = set()
+        self._identity_key: Optional[RSA.RsaKey] = None
+        self._identity_pubkey: Optional[str] = None
+        self._identity_lock = Lock()
+        self._intercom: Optional[IntercomCrypto] = None
+        self._seen_flood_ids = DedupCache.from_config(get_config_snapshot().get("flood_dedup", {}))
+        self._seen_message_ids = DedupCache.from_config(get_config_snapshot().get("flood_dedup", {}))
+        self.presence = PresenceBuffer(self.db,
+                                       flush_interval=get_config_snapshot().get("last_seen_flush_interval", 10))
+        self.presence.start()
+        # storage I/O never runs in the network threads
+        self.async_db = AsyncClientDatabase(self.db)
+        self._refresh_future = None
+        self.broadcast_group = BroadcastGroup(distribute=self._distribute_group_key)
+        self.writers = OutboundWriterPool.from_config(get_config_snapshot().get("outbound_queue", {}))
+        self.zero_copy_binary = get_config_snapshot().get("binary_zero_copy", False)
+        # disk space for incoming streams, shared by every client
+        self.spool_budget = SpoolBudget.from_config(get_config_snapshot().get("binary_streams", {}))
+        self.handshake_pool = HandshakePool.from_config(get_config_snapshot().get("handshake_pool", {}))
+        self.tickets = TicketIssuer.from_config(get_config_snapshot().get("session_tickets", {}))
+        self.image_batcher = FrameBatcher.from_config(get_config_snapshot().get("numpy_image_batch", {}),
+                                                      self._handle_image_batch)
         self.agent_protocol.hm_protocol = self
         if not self.binary_data_protocol:
             # just logs received messages
@@ -229,6 +756,30 @@ class HiveMindListenerProtocol:
         else:
             self.binary_data_protocol.hm_protocol = self
 
+    @property
+    def identity_key(self) -> RSA.RsaKey:
+        """node private key, read (or generated) once and shared by every connection"""
+        if self._identity_key is None:
+            with self._identity_lock:
+                if self._identity_key is None:
+                    self._identity_key = HandShake(self.identity.private_key).private_key
+        return self._identity_key
+
+    @property
+    def intercom(self) -> IntercomCrypto:
+        """decrypts INTERCOM payloads with the shared identity key"""
+        if self._intercom is None:
+            self._intercom = IntercomCrypto.from_config(self.identity_key,
+                                                        get_config_snapshot().get("intercom", {}))
+        return self._intercom
+
+    @property
+    def identity_pubkey(self) -> str:
+        """PEM public key sent to clients in HELLO"""
+        if self._identity_pubkey is None:
+            self._identity_pubkey = self.identity_key.public_key().export_key(format="PEM").decode("utf-8")
+        return self._identity_pubkey
+
     def get_bus(self, client: HiveMindClientConnection) -> Union[FakeBus, MessageBusClient]:
         # allow subclasses to use dedicated bus per client
         return self.agent_protocol.bus
@@ -270,7 +821,7 @@ class HiveMindListenerProtocol:
         msg = HiveMessage(
             HiveMessageType.HELLO,
             payload={
-                "pubkey": client.handshake.pubkey,
+                "pubkey": client.handshake.pubkey if client.handshake else self.identity_pubkey,
                 # allows any node to verify messages are signed with this
                 "peer": client.peer,  # this identifies the connected client in ovos message.context
                 "node_id": self.peer
@@ -281,9 +832,8 @@ class HiveMindListenerProtocol:
 
         needs_handshake = not client.crypto_key and self.handshake_enabled
 
-        cfg = get_server_config()
-        allowed_ciphers = cfg.get("allowed_ciphers") or [SupportedCiphers.AES_GCM]
-        allowed_encodings = cfg.get("allowed_encodings") or list(SupportedEncodings)
+        cfg = get_config_snapshot()
+        negotiation = get_crypto_negotiation()
 
         # request client to start handshake (by sending client pubkey)
         payload = {
@@ -296,8 +846,12 @@ class HiveMindListenerProtocol:
             "password": client.pswd_handshake
                         is not None,  # is password available (V1 proto, replaces pre-shared key)
             "crypto_required": self.require_crypto,  # do we allow unencrypted payloads
-            "encodings": allowed_encodings,
-            "ciphers": allowed_ciphers
+            "encodings": list(negotiation.encodings),
+            "ciphers": list(negotiation.ciphers),
+            "group_key": cfg.get("group_key", False),  # broadcasts can be encrypted with a shared key
+            "batch": cfg.get("batch", {}).get("window", 0) > 0,  # several messages per encrypted frame
+            "compression": list(cfg.get("compression", {}).get("algorithms") or []),
+            "session_tickets": self.tickets is not None  # reconnect with a ticket from the handshake reply
         }
         msg = HiveMessage(HiveMessageType.HANDSHAKE, payload)
         LOG.debug(f"starting {client.peer} HANDSHAKE: {payload}")
@@ -307,11 +861,20 @@ class HiveMindListenerProtocol:
 
     def update_last_seen(self, client: HiveMindClientConnection):
         """track timestamps of last client interaction"""
-        with self.db:
-            user = self.db.get_client_by_api_key(client.key)
-            user.last_seen = time.time()
-            LOG.debug(f"updated last seen timestamp: {client.key} - {user.last_seen}")
-            self.db.update_item(user)
+        client.last_seen = time.time()
+        self.presence.touch(client.key, client.last_seen)
+
+    def shutdown(self):
+        """persist any pending state before the process exits"""
+        self.presence.stop()
+        self.async_db.shutdown()
+        if self.writers is not None:
+            self.writers.shutdown()
+        if self.handshake_pool is not None:
+            self.handshake_pool.shutdown()
+        if self.image_batcher is not None:
+            self.image_batcher.shutdown()
+        self.db.close()
 
     def handle_client_disconnected(self, client: HiveMindClientConnection):
         try:
@@ -331,6 +894,15 @@ class HiveMindListenerProtocol:
 
         if client.peer in self.clients:
             self.clients.pop(client.peer)
+        self.broadcast_group.leave(client)
+        client.group_key_id = -1
+        client.flush_batch()
+        if client.streams is not None:
+            client.streams.close()
+        if self.image_batcher is not None:
+            self.image_batcher.discard(client)
+        if self._intercom is not None:
+            self._intercom.forget(client.peer)
         client.disconnect()
         message = Message(
             "hive.client.disconnect",
@@ -390,12 +962,16 @@ class HiveMindListenerProtocol:
         bus = self.get_bus(client)
         bus.emit(message)
 
-    def handle_message(self, message: HiveMessage, client: HiveMindClientConnection):
+    def handle_message(self, message: Union[HiveMessage, HiveMessageBatch], client: HiveMindClientConnection):
         """
         message (HiveMessage): HiveMind message object
 
         Process message from client, decide what to do internally here
         """
+        if isinstance(message, HiveMessageBatch):
+            for m in message:
+                self.handle_message(m, client)
+            return
         LOG.debug(f"message: {message}")
         # update internal peer ID
         message.update_source_peer(client.peer)
@@ -442,45 +1018,97 @@ class HiveMindListenerProtocol:
     def handle_binary_message(
             self, message: HiveMessage, client: HiveMindClientConnection
     ):
+        """dispatch binary payloads to the binary data protocol
+
+        with the binary_zero_copy config enabled the payload is a memoryview of the decrypted frame,
+        handlers that keep the data after returning must copy it with bytes()
+
+        FILE and TTS_AUDIO payloads may arrive as a chunked stream, chunks are spooled to a temporary
+        file and the handler receives a SpooledPayload stream once the transfer completes
+        """
         assert message.msg_type == HiveMessageType.BINARY
-        bin_data = message.payload
-        if message.bin_type == HiveMindBinaryPayloadType.RAW_AUDIO:
-            sr = message.metadata.get("sample_rate", 16000)
-            sw = message.metadata.get("sample_width", 2)
+        if StreamReceiver.is_stream(message):
+            if client.streams is None:
+                client.streams = StreamReceiver.from_config(get_config_snapshot().get("binary_streams", {}),
+                                                            budget=self.spool_budget)
+            try:
+                stream = client.streams.handle(message)
+            except StreamError as e:
+                LOG.error(f"invalid binary stream from {client.peer}: {e}")
+                return
+            if stream is not None:
+                try:
+                    with SpooledPayload(stream.file, stream.size) as payload:
+                        self._dispatch_binary(stream.bin_type, payload, stream.metadata, client)
+                finally:
+                    client.streams.release(stream)
+            return
+        self._dispatch_binary(message.bin_type, message.payload, message.metadata, client)
+
+    def _dispatch_binary(self, bin_type: HiveMindBinaryPayloadType,
+                         bin_data: Union[bytes, memoryview, SpooledPayload],
+                         metadata: Dict[str, Any], client: HiveMindClientConnection):
+        if bin_type == HiveMindBinaryPayloadType.RAW_AUDIO:
+            sr = metadata.get("sample_rate", 16000)
+            sw = metadata.get("sample_width", 2)
             self.binary_data_protocol.handle_microphone_input(bin_data, sr, sw, client)
-        elif message.bin_type == HiveMindBinaryPayloadType.STT_AUDIO_TRANSCRIBE:
-            lang = message.metadata.get("lang")
-            sr = message.metadata.get("sample_rate", 16000)
-            sw = message.metadata.get("sample_width", 2)
+        elif bin_type == HiveMindBinaryPayloadType.STT_AUDIO_TRANSCRIBE:
+            lang = metadata.get("lang")
+            sr = metadata.get("sample_rate", 16000)
+            sw = metadata.get("sample_width", 2)
             self.binary_data_protocol.handle_stt_transcribe_request(bin_data, sr, sw, lang, client)
-        elif message.bin_type == HiveMindBinaryPayloadType.STT_AUDIO_HANDLE:
-            lang = message.metadata.get("lang")
-            sr = message.metadata.get("sample_rate", 16000)
-            sw = message.metadata.get("sample_width", 2)
+        elif bin_type == HiveMindBinaryPayloadType.STT_AUDIO_HANDLE:
+            lang = metadata.get("lang")
+            sr = metadata.get("sample_rate", 16000)
+            sw = metadata.get("sample_width", 2)
             self.binary_data_protocol.handle_stt_handle_request(bin_data, sr, sw, lang, client)
-        elif message.bin_type == HiveMindBinaryPayloadType.TTS_AUDIO:
-            lang = message.metadata.get("lang")
-            utt = message.metadata.get("utterance")
-            file_name = message.metadata.get("file_name")
+        elif bin_type == HiveMindBinaryPayloadType.TTS_AUDIO:
+            lang = metadata.get("lang")
+            utt = metadata.get("utterance")
+            file_name = metadata.get("file_name")
             self.binary_data_protocol.handle_receive_tts(bin_data, utt, lang, file_name, client)
-        elif message.bin_type == HiveMindBinaryPayloadType.FILE:
-            file_name = message.metadata.get("file_name")
+        elif bin_type == HiveMindBinaryPayloadType.FILE:
+            file_name = metadata.get("file_name")
             self.binary_data_protocol.handle_receive_file(bin_data, file_name, client)
-        elif message.bin_type == HiveMindBinaryPayloadType.NUMPY_IMAGE:
-            # TODO - convert to numpy array
-            camera_id = message.metadata.get("camera_id")
-            self.binary_data_protocol.handle_numpy_image(bin_data, camera_id, client)
+        elif bin_type == HiveMindBinaryPayloadType.NUMPY_IMAGE:
+            camera_id = metadata.get("camera_id")
+            try:
+                # ndarray view of the payload if numpy is installed and the sender gave shape/dtype
+                image = decode_numpy_image(bin_data, metadata)
+            except (ValueError, TypeError) as e:
+                LOG.error(f"invalid numpy image from {client.peer}: {e}")
+                return
+            if image is not None:
+                bin_data = image
+            if self.image_batcher is not None:
+                self.image_batcher.add(bin_data, camera_id, client)
+            else:
+                self.binary_data_protocol.handle_numpy_image(bin_data, camera_id, client)
         else:
             LOG.warning(f"Ignoring received untyped binary data: {len(bin_data)} bytes")
 
+    def _handle_image_batch(self, frames: List[Any], camera_id: str, client: HiveMindClientConnection):
+        """deliver a batch of frames from one camera, per frame if the binary protocol has no batch handler"""
+        handler = getattr(self.binary_data_protocol, "handle_numpy_image_batch", None)
+        if handler is not None:
+            handler(frames, camera_id, client)
+            return
+        for frame in frames:
+            self.binary_data_protocol.handle_numpy_image(frame, camera_id, client)
+
     def handle_handshake_message(
             self, message: HiveMessage, client: HiveMindClientConnection
     ):
         LOG.debug("handshake received, generating session key")
+        if "pubkey" in message.payload and client.handshake is None:
+            # created on first use, pre-shared key and password clients never need it
+            try:
+                client.handshake = handshake_from_key(self.identity_key)
+            except Exception as e:
+                LOG.error(f"failed to load the node identity key: {e}")
         if "pubkey" in message.payload and client.handshake is not None:
             pub = message.payload.pop("pubkey")
-            envelope_out = client.handshake.generate_handshake(pub)
-            client.crypto_key = client.handshake.secret  # start using new key
+            job = (rsa_handshake, client.handshake.private_key, pub)
 
             # client side
             # LOG.info("Received encryption key")
@@ -493,31 +1121,30 @@ class HiveMindListenerProtocol:
         elif client.pswd_handshake is not None and "envelope" in message.payload:
             # sorted by preference from client
             encodings = message.payload.get("encodings") or [SupportedEncodings.JSON_HEX]
-            encodings = [_norm_encoding(e) for e in encodings]
             ciphers = message.payload.get("ciphers") or [SupportedCiphers.AES_GCM]
-            ciphers = [_norm_cipher(c) for c in ciphers]
-
-            # allowed ciphers/encodings defined in config
-            cfg = get_server_config()
-            allowed_encodings = cfg.get("allowed_encodings") or list(SupportedEncodings)
-            allowed_ciphers = cfg.get("allowed_ciphers") or [SupportedCiphers.AES_GCM]
 
-            encodings = [e for e in encodings if e in allowed_encodings]
-            ciphers = [c for c in ciphers if c in allowed_ciphers]
-            if not ciphers or not encodings:
+            # from the options allowed in config, select the one the client prefers
+            # or the cheapest one if configured to override the client
+            negotiation = get_crypto_negotiation()
+            cipher = negotiation.select_cipher(ciphers)
+            encoding = negotiation.select_encoding(encodings)
+            if not cipher or not encoding:
                 LOG.warning("Client tried to connect with invalid cipher/encoding")
                 # TODO - invalid handshake handler
                 client.disconnect()
                 return
 
-            # from the allowed options, select the one the client prefers
-            client.cipher = ciphers[0]
-            client.encoding = encodings[0]
+            client.cipher = cipher
+            client.encoding = encoding
             client.binarize = message.payload.get("binarize", False)
+            if client.binarize:
+                client.adaptive = AdaptiveBinarization.from_config(
+                    get_config_snapshot().get("adaptive_binarize", {}))
 
-            envelope = message.payload["envelope"]
-            envelope_out = client.pswd_handshake.generate_handshake()
-            client.pswd_handshake.receive_handshake(envelope)
+            # key is derived safely from password in both sides
+            # the handshake is validating both ends have the same password
+            # the key is never actually transmitted
+            job = (password_handshake, client.pswd_handshake.password, message.payload["envelope"])
 
             # if not client.pswd_handshake.receive_and_verify(envelope):
             #     # TODO - different handles for invalid access key / invalid password
@@ -525,11 +1152,6 @@ class HiveMindListenerProtocol:
             #     client.disconnect()
             #     return
 
-            # key is derived safely from password in both sides
-            # the handshake is validating both ends have the same password
-            # the key is never actually transmitted
-            client.crypto_key = client.pswd_handshake.secret
-
             # client side
             # LOG.info("Received password envelope")
             # self.pswd_handshake.receive_and_verify(payload["envelope"])
@@ -539,11 +1161,135 @@ class HiveMindListenerProtocol:
             client.disconnect()
             return
 
+        if self.handshake_pool is None:
+            try:
+                result = job[0](*job[1:])
+            except Exception as e:
+                LOG.error(f"handshake with {client.peer} failed: {e}")
+                client.disconnect()
+                return
+            self._finish_handshake(message, client, *result)
+            return
+
+        # RSA and pbkdf2 run in the pool, this thread goes back to serving other clients
+        def on_done(future):
+            try:
+                result = future.result()
+            except Exception as e:
+                LOG.error(f"handshake with {client.peer} failed: {e}")
+                client.disconnect()
+                return
+            try:
+                self._finish_handshake(message, client, *result)
+            except Exception as e:
+                LOG.exception(f"failed to complete handshake with {client.peer}: {e}")
+                client.disconnect()
+
+        try:
+            self.handshake_pool.submit(*job).add_done_callback(on_done)
+        except RuntimeError:  # pool already shut down
+            client.disconnect()
+
+    def _finish_handshake(self, message: HiveMessage, client: HiveMindClientConnection,
+                          envelope_out: str, secret: bytes, state: Dict[str, Any]):
+        """start using the session key computed by handle_handshake_message and answer the client"""
+        shake = client.pswd_handshake if "salt" in state else client.handshake
+        for k, v in state.items():
+            setattr(shake, k, v)
+        client.crypto_key = secret  # start using new key
+
+        # compression applies to every frame after this handshake reply
+        compression = CompressionSettings.negotiate(message.payload.get("compression"),
+                                                    get_config_snapshot().get("compression", {}))
+        batch = bool(message.payload.get("batch"))
+        group_key = bool(message.payload.get("group_key"))
+        payload = {"envelope": envelope_out,
+                   "encoding": client.encoding,
+                   "cipher": client.cipher,
+                   "compression": compression.algo if compression else None}
+        if self.tickets is not None:
+            payload["ticket"] = self._issue_ticket(client, compression, batch, group_key)
+        msg = HiveMessage(HiveMessageType.HANDSHAKE, payload)
+        client.send(msg)  # client can recreate crypto_key on his side now
+        self._start_session(client, compression, batch, group_key)
+
+    def _start_session(self, client: HiveMindClientConnection, compression: Optional[CompressionSettings],
+                       batch: bool, group_key: bool):
+        """apply the options negotiated in a handshake, or restored from a session ticket"""
+        client.compression = compression
+
+        cfg = get_config_snapshot().get("batch", {})
+        if batch and cfg.get("window", 0) > 0:
+            client.batch_window = cfg["window"]
+            client.batch_max = cfg.get("max_messages", 32)
+
+        # json clients may opt in to receive broadcasts encrypted with the shared group key
+        if group_key and not client.binarize \
+                and get_config_snapshot().get("group_key", False):
+            self.broadcast_group.join(client)
+
+    def _issue_ticket(self, client: HiveMindClientConnection, compression: Optional[CompressionSettings],
+                      batch: bool, group_key: bool) -> str:
+        return self.tickets.issue(SessionTicket(key=client.key,
+                                                secret=client.crypto_key,
+                                                cipher=getattr(client.cipher, "value", client.cipher),
+                                                encoding=getattr(client.encoding, "value", client.encoding),
+                                                binarize=bool(client.binarize),
+                                                compression=compression.algo.value if compression else None,
+                                                batch=batch,
+                                                group_key=group_key))
+
+    def _resume_session(self, ticket: str, client: HiveMindClientConnection):
+        """resume the session described by a ticket from a previous connection, skipping the handshake
+
+        the client derives the same session key from the nonce in the reply,
+        if the ticket is rejected the client falls back to a regular handshake
+        """
+        state = self.tickets.redeem(ticket, client.key)
+        negotiation = get_crypto_negotiation()
+        cipher = encoding = None
+        if state is not None:
+            # the allowed options may have changed since the ticket was issued
+            cipher = negotiation.select_cipher([state.cipher])
+            encoding = negotiation.select_encoding([state.encoding])
+        if not cipher or not encoding:
+            LOG.debug(f"{client.peer} presented an invalid or expired session ticket")
+            client.send(HiveMessage(HiveMessageType.HANDSHAKE, {"resumed": False}))
+            return
+
+        nonce = secrets.token_bytes(16)
+        client.cipher = cipher
+        client.encoding = encoding
+        client.binarize = state.binarize
+        if client.binarize:
+            client.adaptive = AdaptiveBinarization.from_config(
+                get_config_snapshot().get("adaptive_binarize", {}))
+        client.crypto_key = derive_resumption_key(state.secret, nonce)
+        compression = CompressionSettings.negotiate([state.compression] if state.compression else [],
+                                                    get_config_snapshot().get("compression", {}))
+        LOG.debug(f"resuming session of {client.peer} from ticket")
         msg = HiveMessage(HiveMessageType.HANDSHAKE,
-                          {"envelope": envelope_out,
+                          {"resumed": True,
+                           "nonce": nonce.hex(),
                            "encoding": client.encoding,
-                           "cipher": client.cipher })
-        client.send(msg)  # client can recreate crypto_key on his side now
+                           "cipher": client.cipher,
+                           "compression": compression.algo if compression else None,
+                           "ticket": self._issue_ticket(client, compression, state.batch, state.group_key)})
+        client.send(msg)
+        self._start_session(client, compression, state.batch, state.group_key)
+
+    def _distribute_group_key(self, group: GroupKey, members: List[HiveMindClientConnection]):
+        """send a rotated group key to every member over its own encrypted session"""
+        msg = HiveMessage(HiveMessageType.BUS,
+                          Message(GROUP_KEY_MESSAGE, {"key": group.key, "key_id": group.key_id}))
+        for member in members:
+            try:
+                member.send(msg)
+            except Exception as e:
+                LOG.error(f"failed to send group key to {member.peer}: {e}")
+                continue
+            # only use the group key for this member once it has been delivered
+            member.group_key_id = group.key_id
 
     def handle_hello_message(self, message: HiveMessage, client: HiveMindClientConnection):
         """
@@ -571,6 +1317,8 @@ class HiveMindListenerProtocol:
             client.disconnect()
         else:
             self.clients[client.peer] = client
+            if "ticket" in payload and self.tickets is not None and not client.crypto_key:
+                self._resume_session(payload["ticket"], client)
 
     def handle_bus_message(
             self, message: HiveMessage, client: HiveMindClientConnection
@@ -610,6 +1358,9 @@ class HiveMindListenerProtocol:
             # TODO kick client for misbehaviour so it stops doing that?
             return
 
+        if self._is_duplicate(payload):
+            return
+
         if self.broadcast_callback:
             self.broadcast_callback(payload)
 
@@ -624,11 +1375,19 @@ class HiveMindListenerProtocol:
                 self.handle_bus_message(message.payload, client)
 
         # broadcast message to other peers
-        payload = self._unpack_message(message, client)
-        for peer in self.clients:
-            if peer == client.peer:
+        self.fan_out(payload, exclude=client.peer)
+
+    def fan_out(self, message: HiveMessage, exclude: Optional[str] = None):
+        """send a message to every connected client except `exclude`
+
+        the message is serialized at most once per wire format, only encryption runs per peer,
+        members of the broadcast group share a single ciphertext
+        """
+        wire = WireMessage(message, group=self.broadcast_group.key())
+        for peer, conn in list(self.clients.items()):
+            if peer == exclude:
                 continue
-            self.clients[peer].send(payload)
+            conn.send(wire)
 
     def _unpack_message(self, message: HiveMessage, client: HiveMindClientConnection):
         # propagate message to other peers
@@ -637,8 +1396,20 @@ class HiveMindListenerProtocol:
         pload.replace_route(message.route)
         pload.update_source_peer(self.peer)
         pload.remove_target_peer(client.peer)
+        # the id travels with the payload, the next hop re-wraps it
+        if message.metadata.get("msg_id"):
+            pload.metadata.setdefault("msg_id", message.metadata["msg_id"])
         return pload
 
+    def _is_duplicate(self, payload: HiveMessage) -> bool:
+        """BROADCAST/PROPAGATE payloads carrying a "msg_id" in metadata are only handled once,
+        copies looping back through cyclic topologies are dropped"""
+        msg_id = payload.metadata.get("msg_id")
+        if msg_id and self._seen_message_ids.seen(msg_id):
+            LOG.debug(f"dropping duplicate message: {msg_id}")
+            return True
+        return False
+
     def handle_propagate_message(
             self, message: HiveMessage, client: HiveMindClientConnection
     ):
@@ -658,6 +1429,9 @@ class HiveMindListenerProtocol:
             # TODO kick client for misbehaviour so it stops doing that?
             return
 
+        if self._is_duplicate(payload):
+            return
+
         if self.propagate_callback:
             self.propagate_callback(payload)
 
@@ -675,10 +1449,7 @@ class HiveMindListenerProtocol:
             self.handle_ping_message(payload, client)
 
         # propagate message to other peers
-        for peer in self.clients:
-            if peer == client.peer:
-                continue
-            self.clients[peer].send(payload)
+        self.fan_out(payload, exclude=client.peer)
 
         # send to other masters
         message = Message(
@@ -719,14 +1490,9 @@ class HiveMindListenerProtocol:
         self.hive_mapper.on_ping(message, received_at=time.time())
 
         # Flood-loop prevention: if we already responded to this flood_id, stop
-        if not flood_id or flood_id in self._seen_flood_ids:
+        if not flood_id or self._seen_flood_ids.seen(flood_id):
             return
 
-        # Evict oldest entries when cache is full (FIFO-ish)
-        while len(self._seen_flood_ids) >= 1000:
-            self._seen_flood_ids.pop()
-        self._seen_flood_ids.add(flood_id)
-
         # Build our own responsive PING with the same flood_id
         own_ping_payload = {
             "flood_id": flood_id,
@@ -739,9 +1505,8 @@ class HiveMindListenerProtocol:
 
         LOG.debug(f"Sending responsive PING for flood_id={flood_id}")
 
-        # Send to all downstream peers
-        for peer_id, conn in self.clients.items():
-            conn.send(own_ping_outer)
+        # Send to all downstream peers, serialized once for all of them
+        self.fan_out(own_ping_outer)
 
     def handle_escalate_message(
             self, message: HiveMessage, client: HiveMindClientConnection
@@ -788,18 +1553,14 @@ class HiveMindListenerProtocol:
             return False
 
         pload = message.payload
-        if isinstance(pload, dict) and "ciphertext" in pload:
+        if IntercomCrypto.is_encrypted(pload):
             try:
-                ciphertext = pybase64.b64decode(pload["ciphertext"])
-                signature = pybase64.b64decode(pload["signature"])
-
                 # TODO - allow verifying, we need to store trusted pubkeys before this can be done
+                # signature = pybase64.b64decode(pload["signature"])
                 # pub = ""
                 # verified = verify_RSA(pub, ciphertext, signature)
 
-                private_key = load_RSA_key(self.identity.private_key)
-
-                decrypted: str = decrypt_RSA(private_key, ciphertext).decode("utf-8")
+                decrypted: str = self.intercom.decrypt(pload, sender=client.peer)
                 message._payload = HiveMessage.deserialize(decrypted)
             except:
                 if k:
@@ -830,29 +1591,32 @@ class HiveMindListenerProtocol:
         return False
 
     # HiveMind mycroft bus messages -  from slave -> master
-    def _update_blacklist(self, message: Message, client: HiveMindClientConnection):
+    def _refresh_policy(self, client: HiveMindClientConnection) -> ClientPolicy:
+        """recompile the client permissions if the database changed,
+        to account for changes without requiring a restart"""
+        # check storage in the background, changes apply from the next message on
+        if self._refresh_future is None or self._refresh_future.done():
+            self._refresh_future = self.async_db.refresh_future()
+        if client.policy is None or client.db_generation != self.db.generation:
+            user = self.db.get_client_by_api_key(client.key)
+            if user:
+                client.skill_blacklist = user.skill_blacklist or []
+                client.intent_blacklist = user.intent_blacklist or []
+                client.msg_blacklist = user.message_blacklist or []
+                client.allowed_types = user.allowed_types or []
+            client.compile_policy()
+            client.db_generation = self.db.generation
+        return client.policy
+
+    def _update_blacklist(self, message: Message, client: HiveMindClientConnection,
+                          policy: Optional[ClientPolicy] = None):
         LOG.debug("replacing message metadata with hivemind client session")
-        message.context["session"] = client.sess.serialize()
-
-        # update blacklist from db, to account for changes without requiring a restart
-        self.db.sync()
-        user = self.db.get_client_by_api_key(client.key)
-        client.skill_blacklist = user.skill_blacklist or []
-        client.intent_blacklist = user.intent_blacklist or []
-        client.msg_blacklist = user.message_blacklist or []
+        message.context["session"] = sess = client.sess.serialize()
 
         # inject client specific blacklist into session
-        if "blacklisted_skills" not in message.context["session"]:
-            message.context["session"]["blacklisted_skills"] = []
-        if "blacklisted_intents" not in message.context["session"]:
-            message.context["session"]["blacklisted_intents"] = []
-
-        message.context["session"]["blacklisted_skills"] += [s for s in client.skill_blacklist
-                                                             if
-                                                             s not in message.context["session"]["blacklisted_skills"]]
-        message.context["session"]["blacklisted_intents"] += [s for s in client.intent_blacklist
-                                                              if s not in message.context["session"][
-                                                                  "blacklisted_intents"]]
+        policy = policy or self._refresh_policy(client)
+        sess["blacklisted_skills"] = policy.merge_skill_blacklist(sess.get("blacklisted_skills") or [])
+        sess["blacklisted_intents"] = policy.merge_intent_blacklist(sess.get("blacklisted_intents") or [])
         return message
 
     def handle_inject_agent_msg(
@@ -864,13 +1628,14 @@ class HiveMindListenerProtocol:
         # A Slave wants to inject a message in internal mycroft bus
         # You are a Master, authorize bus message
 
-        # messages/skills/intents per user
+        # messages/skills/intents per user, looked up once per message
+        policy = self._refresh_policy(client)
         if not client.authorize(message):
             LOG.warning(client.peer + " sent an unauthorized bus message")
             return
 
         # ensure client specific session data is injected in query to ovos
-        message = self._update_blacklist(message, client)
+        message = self._update_blacklist(message, client, policy)
         if message.msg_type == "speak":
             message.context["destination"] = ["audio"]  # make audible, this is injected "speak" command
         elif message.context.get("destination") is None:
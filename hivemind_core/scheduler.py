@@ -0,0 +1,75 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import heapq
+import itertools
+import time
+from threading import Condition, Thread
+from typing import Any, Callable, List, Optional, Tuple
+
+from ovos_utils.log import LOG
+
+
+class ScheduledCall:
+    """handle returned by Scheduler.call_later"""
+
+    def __init__(self, fn: Callable[..., Any], args: Tuple[Any, ...]):
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """runs delayed callbacks on a single thread, instead of a threading.Timer thread per callback
+
+    callbacks run one at a time and must be quick, slow work belongs in a worker pool
+    """
+
+    def __init__(self, name: str = "hivemind-scheduler"):
+        self.name = name
+        self._heap: List[Tuple[float, int, ScheduledCall]] = []
+        self._seq = itertools.count()  # keeps calls due at the same time in submission order
+        self._cond = Condition()
+        self._thread: Optional[Thread] = None
+
+    def call_later(self, delay: float, fn: Callable[..., Any], *args) -> ScheduledCall:
+        call = ScheduledCall(fn, args)
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), call))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return call
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, call = heapq.heappop(self._heap)
+            if call.cancelled:
+                continue
+            try:
+                call.fn(*call.args)
+            except Exception as e:
+                LOG.error(f"scheduled call {call.fn} failed: {e}")
+
+
+# shared by every client connection in the process
+SCHEDULER = Scheduler()
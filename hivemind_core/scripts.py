@@ -13,7 +13,9 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import csv
 import os
+import sys
 
 import click
 import json
@@ -26,6 +28,9 @@ from hivemind_core.service import HiveMindService
 from hivemind_core.config import get_server_config
 
 
+CSV_COLUMNS = ["client_id", "name", "is_admin", "access_key", "password", "crypto_key"]
+
+
 def prompt_node_id(db: ClientDatabase) -> int:
     """
     Prompts the user to select a client ID from the database, displaying available clients in a table.
@@ -295,22 +300,74 @@ def export_clients(path):
     
     If a directory path is provided, the CSV will be saved as 'hivemind_clients.csv' in that directory. If a file path is provided, the CSV will be saved to that file. If no path is given, the CSV content is printed to stdout. Excludes clients with client_id == -1.
     
+    Rows are streamed from the database in batches, memory usage does not grow with the number of clients.
+    
     Args:
         path: Optional file or directory path for the CSV output.
     """
     if path and os.path.isdir(path):
         path = os.path.join(path, "hivemind_clients.csv")
 
-    CSV = "client_id,name,is_admin,access_key,password,crypto_key"
-    with ClientDatabase() as db:
-        for x in db:
-            if x["client_id"] != -1:
-                CSV += f"\n{x['client_id']},{x['name']},{x['is_admin']},{x['api_key']},{x['password']},{x['crypto_key']}"
-    if path:
-        with open(path, "w") as f:
-            f.write(CSV)
-    else:
-        print(CSV)
+    f = open(path, "w", newline="") if path else sys.stdout
+    try:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+        with ClientDatabase() as db:
+            for batch in db.iter_clients():
+                # unset values are written as None, like previous versions did
+                writer.writerows(["None" if v is None else v
+                                  for v in (x.client_id, x.name, x.is_admin, x.api_key, x.password, x.crypto_key)]
+                                 for x in batch if x.client_id != -1)
+    finally:
+        if path:
+            f.close()
+
+
+@hmcore_cmds.command(help="Import clients and credentials from a CSV file.", name="import-clients")
+@click.option("--path", required=False, type=str, help="CSV file to read, stdin if not provided")
+def import_clients(path):
+    """
+    Adds or updates clients in bulk from a CSV file in the format written by export-clients.
+    
+    The client_id column is ignored, new ids are allocated. Existing access keys are updated, empty or
+    missing columns keep their current values. New clients with a missing access key or password get
+    random ones, use export-clients afterwards to retrieve them. Revoked entries are skipped.
+    All clients are saved in a single commit.
+    
+    Args:
+        path: Optional CSV file path, reads from stdin if not provided.
+    """
+    def _value(row, k):
+        v = (row.get(k) or "").strip()
+        return None if v in ("", "None") else v
+
+    def _rows(f, db):
+        for row in csv.DictReader(f):
+            access_key = _value(row, "access_key") or os.urandom(16).hex()
+            if access_key == "revoked":
+                continue
+            admin = _value(row, "is_admin")
+            kwargs = {"name": _value(row, "name"),
+                      "key": access_key,
+                      "admin": None if admin is None else admin.lower() in ("true", "1", "yes"),
+                      "crypto_key": _value(row, "crypto_key"),
+                      "password": _value(row, "password")}
+            if db.get_client_by_api_key(access_key) is None:
+                # None keeps the stored value of an existing client, only new ones get defaults
+                kwargs["name"] = kwargs["name"] or f"HiveMind-Node-{access_key[:8]}"
+                kwargs["admin"] = bool(kwargs["admin"])
+                kwargs["password"] = kwargs["password"] or os.urandom(16).hex()
+            yield kwargs
+
+    f = open(path, newline="") if path else sys.stdin
+    try:
+        with ClientDatabase() as db:
+            print(f"Database backend: {db.db.__class__.__name__}", file=sys.stderr)
+            count = db.add_clients_bulk(_rows(f, db))
+    finally:
+        if path:
+            f.close()
+    print(f"Imported {count} clients", file=sys.stderr)
 
 
 @hmcore_cmds.command(help="Allow a message type to be sent from a client.", name="allow-msg")
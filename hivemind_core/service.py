@@ -154,3 +154,4 @@ class HiveMindService:
         wait_for_exit_signal()  # block until ctrl+c
 
         self._status.set_stopping()
+        hm_protocol.shutdown()
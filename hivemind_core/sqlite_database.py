@@ -0,0 +1,198 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Union, Iterable, List, Optional, Tuple
+
+from ovos_utils.log import LOG
+from ovos_utils.xdg_utils import xdg_data_home
+
+from hivemind_plugin_manager.database import Client, AbstractDB, cast2client
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS clients ("
+    "client_id INTEGER PRIMARY KEY, "
+    "api_key TEXT NOT NULL, "
+    "name TEXT NOT NULL DEFAULT '', "
+    "data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_clients_api_key ON clients(api_key)",
+    "CREATE INDEX IF NOT EXISTS idx_clients_name ON clients(name)",
+)
+# constant statements, compiled once per connection by the sqlite3 statement cache
+_UPSERT = ("INSERT INTO clients (client_id, api_key, name, data) VALUES (?, ?, ?, ?) "
+           "ON CONFLICT(client_id) DO UPDATE SET "
+           "api_key=excluded.api_key, name=excluded.name, data=excluded.data")
+_SELECT_ALL = "SELECT data FROM clients ORDER BY client_id"
+_SELECT_BY = {
+    "client_id": "SELECT data FROM clients WHERE client_id = ?",
+    "api_key": "SELECT data FROM clients WHERE api_key = ? ORDER BY client_id",
+    "name": "SELECT data FROM clients WHERE name = ? ORDER BY client_id",
+}
+_COUNT = "SELECT COUNT(*) FROM clients"
+_MAX_ID = "SELECT MAX(client_id) FROM clients"
+
+
+@dataclass
+class SQLiteDB(AbstractDB):
+    """HiveMind Database implementation using SQLite in WAL mode
+
+    every thread gets its own connection, readers never block on the admin CLI writing to the same file
+    """
+    name: str = "clients"
+    subfolder: str = "hivemind-core"
+    password: Optional[str] = None  # not supported, sqlite files are not encrypted
+    busy_timeout: int = 5000  # ms to wait for another process holding the write lock
+
+    # lookups by client_id, api_key and name are answered by sql indexes, ClientDatabase does not mirror them in memory
+    indexed_lookups = True
+    # per thread connections, a WAL reader sees the last commit without waiting for writers
+    concurrent_reads = True
+
+    def __post_init__(self):
+        if self.password:
+            raise ValueError("hivemind-core-sqlite-db does not support encryption, "
+                             "remove 'password' from its config or use hivemind-json-db-plugin")
+        folder = os.path.join(xdg_data_home(), self.subfolder)
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, f"{self.name}.db")
+        self._local = threading.local()
+        self._conns: List[Tuple[threading.Thread, sqlite3.Connection]] = []  # every open connection
+        self._conns_lock = threading.Lock()
+        conn = self._conn
+        with conn:
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+        LOG.debug(f"sqlite database path: {self.path}")
+
+    @property
+    def storage_paths(self) -> List[str]:
+        """files that change when the database is written, used for change detection"""
+        return [self.path, f"{self.path}-wal"]
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can run from another thread, use stays per thread
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000, cached_statements=32,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+            self._local.conn = conn
+            with self._conns_lock:
+                # thread locals never close the connection, do it for threads that exited since
+                alive = []
+                for thread, c in self._conns:
+                    if thread.is_alive():
+                        alive.append((thread, c))
+                    else:
+                        self._close(c)
+                self._conns = alive + [(threading.current_thread(), conn)]
+        return conn
+
+    @staticmethod
+    def _close(conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            LOG.debug(f"failed to close sqlite connection: {e}")
+
+    def close(self):
+        """close the connections of every thread, uncommitted changes are discarded"""
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+            self._local = threading.local()
+        for _, conn in conns:
+            self._close(conn)
+
+    def add_item(self, client: Client) -> bool:
+        """
+        Add or replace a client in the SQLite database.
+
+        Args:
+            client: The client to be added.
+
+        Returns:
+            True if the addition was successful, False otherwise.
+        """
+        try:
+            self._conn.execute(_UPSERT, (client.client_id, client.api_key,
+                                         client.name or "", client.serialize()))
+            return True
+        except sqlite3.Error as e:
+            LOG.error(f"Failed to add client {client.client_id} - {e}")
+            return False
+
+    def search_by_value(self, key: str, val: Union[str, bool, int, float]) -> List[Client]:
+        """
+        Search for clients by a specific key-value pair, indexed columns are resolved in SQL.
+
+        Args:
+            key: The key to search by.
+            val: The value to search for.
+
+        Returns:
+            A list of clients that match the search criteria.
+        """
+        if key in _SELECT_BY:
+            rows = self._conn.execute(_SELECT_BY[key], (val,)).fetchall()
+            return [cast2client(r[0]) for r in rows]
+        return [c for c in self if c.__dict__.get(key) == val]
+
+    def __len__(self) -> int:
+        """
+        Get the number of clients in the database.
+
+        Returns:
+            The number of clients in the database.
+        """
+        return self._conn.execute(_COUNT).fetchone()[0]
+
+    def max_client_id(self) -> int:
+        """highest client_id stored, including revoked entries, 0 if empty"""
+        return self._conn.execute(_MAX_ID).fetchone()[0] or 0
+
+    def __iter__(self) -> Iterable['Client']:
+        """
+        Iterate over all clients in the SQLite database, rows are streamed in batches.
+
+        Returns:
+            An iterator over the clients in the database.
+        """
+        cursor = self._conn.execute(_SELECT_ALL)
+        while True:
+            rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            for r in rows:
+                yield cast2client(r[0])
+
+    def commit(self) -> bool:
+        """
+        Commit the calling thread's pending changes.
+
+        Returns:
+            True if the commit was successful, False otherwise.
+        """
+        try:
+            self._conn.commit()
+            return True
+        except sqlite3.Error as e:
+            LOG.error(f"Failed to save {self.path} - {e}")
+            return False
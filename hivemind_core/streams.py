@@ -0,0 +1,238 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""chunked transfer of large binary payloads
+
+a stream is a sequence of BINARY messages sharing a stream_id in their metadata
+    begin - carries the payload metadata (file_name, utterance, lang ...), may carry data
+    chunk - data, numbered by stream_seq
+    end   - may carry data, the spooled payload is handed to the binary protocol
+    abort - sender gave up, spooled data is discarded
+
+each message is a regular encrypted frame, so only one chunk is ever held in memory
+"""
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from threading import Lock
+from typing import Any, BinaryIO, Dict, Iterator, Mapping, Optional
+
+from ovos_utils.log import LOG
+
+from hivemind_bus_client.message import HiveMessage, HiveMessageType, HiveMindBinaryPayloadType
+
+STREAMABLE_TYPES = (HiveMindBinaryPayloadType.FILE, HiveMindBinaryPayloadType.TTS_AUDIO)
+
+
+class StreamEvent(str, Enum):
+    BEGIN = "begin"
+    CHUNK = "chunk"
+    END = "end"
+    ABORT = "abort"
+
+
+class StreamError(ValueError):
+    """stream message out of order, unknown or over the configured limits"""
+
+
+class SpooledPayload:
+    """a received stream spooled to a temporary file
+
+    readable like a binary file, `path` points to the spool file and len() gives the size,
+    both are only valid until the handler returns and the file is closed
+    """
+
+    def __init__(self, file: BinaryIO, size: int):
+        self._file = file
+        self.size = size
+
+    @property
+    def path(self) -> str:
+        return self._file.name
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getattr__(self, item):
+        return getattr(self._file, item)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._file.close()
+
+
+class SpoolBudget:
+    """disk space shared by the stream spools of every client, 0 for unlimited"""
+
+    def __init__(self, max_size: int = 0):
+        self.max_size = max_size
+        self.used = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any]) -> 'SpoolBudget':
+        return SpoolBudget(cfg.get("max_total_size", 1024 * 1024 * 1024))
+
+    def reserve(self, size: int) -> bool:
+        with self._lock:
+            if self.max_size > 0 and self.used + size > self.max_size:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size: int):
+        with self._lock:
+            self.used = max(0, self.used - size)
+
+
+@dataclass
+class IncomingStream:
+    stream_id: str
+    bin_type: HiveMindBinaryPayloadType
+    metadata: Dict[str, Any]  # from the begin message
+    file: BinaryIO
+    size: int = 0
+    seq: int = 0  # next expected stream_seq
+
+
+@dataclass
+class StreamReceiver:
+    """reassembles the chunked streams of one client into spool files"""
+    max_size: int = 100 * 1024 * 1024  # bytes per stream
+    max_streams: int = 2  # concurrent streams per client
+    spool_dir: Optional[str] = None  # defaults to the system temp dir
+    budget: Optional[SpoolBudget] = None  # shared with the receivers of other clients
+    streams: Dict[str, IncomingStream] = field(default_factory=dict)
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any], budget: Optional[SpoolBudget] = None) -> 'StreamReceiver':
+        return StreamReceiver(max_size=cfg.get("max_size", 100 * 1024 * 1024),
+                              max_streams=cfg.get("max_streams", 2),
+                              spool_dir=cfg.get("spool_dir"),
+                              budget=budget)
+
+    @staticmethod
+    def is_stream(message: HiveMessage) -> bool:
+        return "stream_id" in message.metadata
+
+    def handle(self, message: HiveMessage) -> Optional[IncomingStream]:
+        """spool a stream message
+
+        Returns:
+            the completed stream, with its file rewound, once the end message is received,
+            pass it to release() once handled
+        """
+        meta = message.metadata
+        stream_id = meta["stream_id"]
+        event = meta.get("stream_event", StreamEvent.CHUNK)
+        if event == StreamEvent.BEGIN:
+            stream = self._begin(stream_id, message)
+        elif event == StreamEvent.ABORT:
+            self.abort(stream_id)
+            return None
+        else:
+            stream = self.streams.get(stream_id)
+            if stream is None:
+                raise StreamError(f"unknown stream: {stream_id}")
+        try:
+            self._write(stream, message)
+        except StreamError:
+            self.abort(stream_id)
+            raise
+        if event != StreamEvent.END:
+            return None
+        self.streams.pop(stream_id)
+        stream.file.flush()
+        stream.file.seek(0)
+        return stream
+
+    def _begin(self, stream_id: str, message: HiveMessage) -> IncomingStream:
+        if message.bin_type not in STREAMABLE_TYPES:
+            raise StreamError(f"{message.bin_type} payloads can not be streamed")
+        if stream_id in self.streams:
+            raise StreamError(f"duplicate stream: {stream_id}")
+        if len(self.streams) >= self.max_streams:
+            raise StreamError(f"too many concurrent streams, max {self.max_streams}")
+        metadata = {k: v for k, v in message.metadata.items() if not k.startswith("stream_")}
+        stream = IncomingStream(stream_id=stream_id, bin_type=message.bin_type, metadata=metadata,
+                                file=tempfile.NamedTemporaryFile(prefix="hivemind-stream-", dir=self.spool_dir))
+        self.streams[stream_id] = stream
+        return stream
+
+    def _write(self, stream: IncomingStream, message: HiveMessage):
+        seq = message.metadata.get("stream_seq", stream.seq)
+        if seq != stream.seq:
+            raise StreamError(f"stream {stream.stream_id} expected chunk {stream.seq}, got {seq}")
+        if message.bin_type != stream.bin_type:
+            raise StreamError(f"stream {stream.stream_id} started as {stream.bin_type}, got {message.bin_type}")
+        data = message.payload
+        if stream.size + len(data) > self.max_size:
+            raise StreamError(f"stream {stream.stream_id} exceeds {self.max_size} bytes")
+        if self.budget is not None and not self.budget.reserve(len(data)):
+            raise StreamError(f"spool budget of {self.budget.max_size} bytes exhausted")
+        if len(data):
+            stream.file.write(data)
+        stream.size += len(data)
+        stream.seq += 1
+
+    def abort(self, stream_id: str):
+        stream = self.streams.pop(stream_id, None)
+        if stream is not None:
+            LOG.debug(f"discarding stream {stream_id} after {stream.size} bytes")
+            self.release(stream)
+
+    def release(self, stream: IncomingStream):
+        """close the spool file of a stream and give its space back to the budget"""
+        stream.file.close()
+        if self.budget is not None:
+            self.budget.release(stream.size)
+
+    def close(self):
+        """discard every incomplete stream, eg. when the client disconnects"""
+        for stream_id in list(self.streams):
+            self.abort(stream_id)
+
+
+def iter_stream_messages(file: BinaryIO, bin_type: HiveMindBinaryPayloadType,
+                         metadata: Optional[Dict[str, Any]] = None,
+                         chunk_size: int = 64 * 1024) -> Iterator[HiveMessage]:
+    """split a file into begin/chunk/end BINARY messages, read lazily one chunk at a time
+
+    files that fit in a single chunk are sent as a regular, unstreamed, message
+    """
+    if bin_type not in STREAMABLE_TYPES:
+        raise StreamError(f"{bin_type} payloads can not be streamed")
+    metadata = dict(metadata or {})
+    chunk, nxt = file.read(chunk_size), file.read(chunk_size)
+    if not nxt:
+        yield HiveMessage(HiveMessageType.BINARY, chunk, bin_type=bin_type, metadata=metadata)
+        return
+
+    stream_id = uuid.uuid4().hex
+    seq = 0
+    while nxt:
+        event = StreamEvent.BEGIN if seq == 0 else StreamEvent.CHUNK
+        meta = metadata if seq == 0 else {}
+        yield HiveMessage(HiveMessageType.BINARY, chunk, bin_type=bin_type,
+                          metadata={**meta, "stream_id": stream_id, "stream_event": event.value,
+                                    "stream_seq": seq})
+        seq += 1
+        chunk, nxt = nxt, file.read(chunk_size)
+    yield HiveMessage(HiveMessageType.BINARY, chunk, bin_type=bin_type,
+                      metadata={"stream_id": stream_id, "stream_event": StreamEvent.END.value,
+                                "stream_seq": seq})
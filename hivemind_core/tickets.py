@@ -0,0 +1,113 @@
+# hivemind-core
+# Copyright (C) 2026 Casimiro Ferreira
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""session resumption tickets
+
+after a handshake the server hands the client an opaque ticket, the session state encrypted with a key
+only the server knows. a reconnecting client sends the ticket in its HELLO, the server answers with a
+nonce and both sides derive the new session key from the previous one, no RSA or pbkdf2 involved
+"""
+import dataclasses
+import hashlib
+import heapq
+import hmac
+import json
+import secrets
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, List, Mapping, Optional, Set, Tuple
+
+from ovos_utils.log import LOG
+
+from hivemind_bus_client.encryption import (SupportedCiphers, SupportedEncodings,
+                                            decrypt_from_json, encrypt_as_json)
+
+
+@dataclass(frozen=True)
+class SessionTicket:
+    """session state needed to resume without a handshake"""
+    key: str  # access key of the client the ticket was issued to
+    secret: bytes  # session key the next one is derived from
+    cipher: str
+    encoding: str
+    binarize: bool = False
+    compression: Optional[str] = None
+    batch: bool = False
+    group_key: bool = False
+    expires: float = 0
+    ticket_id: str = ""  # random, tickets are single use
+
+
+def derive_resumption_key(secret: bytes, nonce: bytes) -> bytes:
+    """session key for a resumed connection, the client computes it the same way"""
+    return hmac.new(secret, b"hivemind-resume" + nonce, hashlib.sha256).digest()
+
+
+class TicketIssuer:
+    """encrypts session tickets with a per process key, tickets do not survive a restart
+
+    every ticket can be redeemed once, resuming hands out a new ticket that replaces the redeemed one
+    """
+
+    def __init__(self, lifetime: float = 3600, key: Optional[bytes] = None):
+        self.lifetime = lifetime
+        self._key = key or secrets.token_bytes(32)
+        # ids of redeemed tickets, kept until the ticket would have expired anyway
+        self._redeemed: Set[str] = set()
+        self._redeemed_expiry: List[Tuple[float, str]] = []
+        self._lock = Lock()
+
+    @staticmethod
+    def from_config(cfg: Mapping[str, Any]) -> Optional['TicketIssuer']:
+        """issuer for the 'session_tickets' config section, None if resumption is disabled"""
+        if not cfg.get("enabled", False):
+            return None
+        return TicketIssuer(lifetime=cfg.get("lifetime", 3600))
+
+    def issue(self, ticket: SessionTicket) -> str:
+        ticket = dataclasses.replace(ticket, expires=time.time() + self.lifetime,
+                                     ticket_id=secrets.token_hex(16))
+        state = {**dataclasses.asdict(ticket), "secret": ticket.secret.hex()}
+        return encrypt_as_json(key=self._key, plaintext=json.dumps(state),
+                               cipher=SupportedCiphers.AES_GCM, encoding=SupportedEncodings.JSON_B64)
+
+    def redeem(self, ticket: str, client_key: str) -> Optional[SessionTicket]:
+        """
+        Returns:
+            the session state, None if the ticket is forged, expired, already redeemed
+            or belongs to another client
+        """
+        try:
+            state = json.loads(decrypt_from_json(key=self._key, ciphertext_json=ticket,
+                                                 cipher=SupportedCiphers.AES_GCM,
+                                                 encoding=SupportedEncodings.JSON_B64))
+            state["secret"] = bytes.fromhex(state["secret"])
+            parsed = SessionTicket(**state)
+        except Exception as e:
+            LOG.debug(f"invalid session ticket: {e}")
+            return None
+        now = time.time()
+        if parsed.key != client_key or parsed.expires < now or not parsed.ticket_id:
+            return None
+        with self._lock:
+            while self._redeemed_expiry and self._redeemed_expiry[0][0] < now:
+                self._redeemed.discard(heapq.heappop(self._redeemed_expiry)[1])
+            if parsed.ticket_id in self._redeemed:
+                LOG.debug("session ticket was already redeemed")
+                return None
+            self._redeemed.add(parsed.ticket_id)
+            heapq.heappush(self._redeemed_expiry, (parsed.expires, parsed.ticket_id))
+        return parsed
@@ -46,12 +46,14 @@ setup(
     packages=["hivemind_core"],
     include_package_data=True,
     install_requires=required("requirements.txt"),
+    extras_require={"numpy": ["numpy"]},
     url="https://github.com/JarbasHiveMind/HiveMind-core",
     license="AGPL-3.0",
     author="jarbasAI",
     author_email="jarbasai@mailfence.com",
     description="Mesh Networking utilities for OpenVoiceOS",
     entry_points={
-        "console_scripts": ["hivemind-core=hivemind_core.scripts:hmcore_cmds"]
+        "console_scripts": ["hivemind-core=hivemind_core.scripts:hmcore_cmds"],
+        "hivemind.database": ["hivemind-core-sqlite-db=hivemind_core.sqlite_database:SQLiteDB"]
     },
 )
@@ -0,0 +1,435 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import unittest
+from unittest import mock
+
+from hivemind_core import database
+from hivemind_core.database import ClientDatabase, AsyncClientDatabase, PresenceBuffer
+from hivemind_plugin_manager.database import AbstractDB
+
+
+class TestClientDatabaseIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.db = ClientDatabase(config={"module": "hivemind-json-db-plugin",
+                                         "hivemind-json-db-plugin": {"name": ".hivemind-index-test"}})
+
+    def tearDown(self):
+        for path in [self.db.db._db.path, self.db.id_sequence.path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_lookup_by_api_key(self):
+        self.db.add_client("node", "key_a")
+        client = self.db.get_client_by_api_key("key_a")
+        self.assertIsNotNone(client)
+        self.assertEqual(client.name, "node")
+        self.assertIs(self.db.get_client_by_id(client.client_id), client)
+        self.assertIsNone(self.db.get_client_by_api_key("missing"))
+
+    def test_lookup_by_name(self):
+        self.db.add_client("node", "key_a")
+        self.db.add_client("node", "key_b")
+        self.db.add_client("other", "key_c")
+        self.assertEqual([c.api_key for c in self.db.get_clients_by_name("node")],
+                         ["key_a", "key_b"])
+
+    def test_update_reindexes(self):
+        self.db.add_client("node", "key_a")
+        client = self.db.get_client_by_api_key("key_a")
+        client.name = "renamed"
+        self.db.update_item(client)
+        self.assertEqual(self.db.get_clients_by_name("node"), [])
+        self.assertEqual(self.db.get_clients_by_name("renamed"), [client])
+
+    def test_delete_unindexes(self):
+        self.db.add_client("node", "key_a")
+        client_id = self.db.get_client_by_api_key("key_a").client_id
+        self.assertTrue(self.db.delete_client("key_a"))
+        self.assertIsNone(self.db.get_client_by_api_key("key_a"))
+        self.assertIsNone(self.db.get_client_by_id(client_id))
+        self.assertEqual(self.db.get_clients_by_name("node"), [])
+        # revoked placeholders are never indexed, even after a reload
+        self.db.db.commit()
+        self.db.sync()
+        self.assertIsNone(self.db.get_client_by_api_key("revoked"))
+
+    def test_lookup_during_commit(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+        found = []
+        with self.db:  # eg. a presence flush holding the storage lock
+            self.db.add_client("other", "key_b")
+            reader = threading.Thread(target=lambda: found.append(self.db.get_client_by_api_key("key_a")))
+            reader.start()
+            reader.join(2)
+            self.assertFalse(reader.is_alive())
+        self.assertEqual(found[0].name, "node")
+
+    def test_sync_rebuilds_indexes(self):
+        self.db.add_client("node", "key_a")
+        self.db.db.commit()
+        self.db.sync()
+        self.assertEqual(self.db.get_client_by_api_key("key_a").name, "node")
+
+
+    def test_sync_skips_unchanged_storage(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+        client, generation = self.db.get_client_by_api_key("key_a"), self.db.generation
+        for _ in range(3):  # eg. a burst of new connections
+            self.db.sync()
+        self.assertIs(self.db.get_client_by_api_key("key_a"), client)
+        self.assertEqual(self.db.generation, generation)
+
+    def test_refresh_only_on_external_change(self):
+        self.db.sync_interval = 0
+        with self.db:
+            self.db.add_client("node", "key_a")
+        generation = self.db.generation
+        # our own commit does not trigger a reload
+        self.assertFalse(self.db.refresh())
+        self.assertEqual(self.db.generation, generation)
+
+        # a different process (eg. admin CLI) edits the store
+        other = ClientDatabase(config={"module": "hivemind-json-db-plugin",
+                                       "hivemind-json-db-plugin": {"name": ".hivemind-index-test"}})
+        with other:
+            other.add_client("cli", "key_b")
+        self.assertTrue(self.db.refresh())
+        self.assertNotEqual(self.db.generation, generation)
+        self.assertEqual(self.db.get_client_by_api_key("key_b").name, "cli")
+
+
+    def test_commit_keeps_external_changes(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+        other = ClientDatabase(config={"module": "hivemind-json-db-plugin",
+                                       "hivemind-json-db-plugin": {"name": ".hivemind-index-test"}})
+        # our change is still uncommitted when another process (eg. admin CLI) commits its own
+        client = self.db.get_client_by_api_key("key_a")
+        client.name = "renamed"
+        self.db.update_item(client)
+        with other:
+            other.add_client("cli", "key_b")
+        with self.db:
+            pass
+        self.assertEqual(self.db.get_client_by_api_key("key_b").name, "cli")
+        fresh = ClientDatabase(config={"module": "hivemind-json-db-plugin",
+                                       "hivemind-json-db-plugin": {"name": ".hivemind-index-test"}})
+        self.assertEqual(fresh.get_client_by_api_key("key_a").name, "renamed")
+        self.assertEqual(fresh.get_client_by_api_key("key_b").name, "cli")
+
+    def test_sync_waits_for_commit(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+        other = ClientDatabase(config={"module": "hivemind-json-db-plugin",
+                                       "hivemind-json-db-plugin": {"name": ".hivemind-index-test"}})
+        updated, release = threading.Event(), threading.Event()
+
+        def flush():  # eg. PresenceBuffer.flush
+            with self.db:
+                client = self.db.get_client_by_api_key("key_a")
+                client.last_seen = 1
+                self.db.update_item(client)
+                updated.set()
+                release.wait(5)
+
+        writer = threading.Thread(target=flush)
+        writer.start()
+        updated.wait(5)
+        with other:
+            other.add_client("cli", "key_b")
+        # a new connection reloading storage must not land in the middle of the flush
+        reader = threading.Thread(target=self.db.sync)
+        reader.start()
+        reader.join(0.2)
+        self.assertTrue(reader.is_alive())
+        release.set()
+        writer.join(5)
+        reader.join(5)
+        fresh = ClientDatabase(config={"module": "hivemind-json-db-plugin",
+                                       "hivemind-json-db-plugin": {"name": ".hivemind-index-test"}})
+        self.assertEqual(fresh.get_client_by_api_key("key_a").last_seen, 1)
+        self.assertEqual(fresh.get_client_by_api_key("key_b").name, "cli")
+
+    def test_generation_ignores_last_seen(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+        generation = self.db.generation
+        buffer = PresenceBuffer(self.db, flush_interval=0)
+        buffer.touch("key_a", 1234)
+        self.assertEqual(self.db.get_client_by_api_key("key_a").last_seen, 1234)
+        self.assertEqual(self.db.generation, generation)
+
+        # permission changes still invalidate compiled policies
+        client = self.db.get_client_by_api_key("key_a")
+        client.skill_blacklist = ["skill"]
+        self.db.update_item(client)
+        self.assertGreater(self.db.generation, generation)
+
+    def test_add_clients_bulk(self):
+        self.db.add_client("existing", "key_0")
+        count = self.db.add_clients_bulk({"name": f"node{i}", "key": f"key_{i}"} for i in range(5))
+        self.assertEqual(count, 5)
+        self.assertEqual(self.db.total_clients(), 5)
+        self.assertEqual(self.db.get_client_by_api_key("key_0").name, "node0")
+        ids = sorted(self.db.get_client_by_api_key(f"key_{i}").client_id for i in range(5))
+        self.assertEqual(ids, [1, 2, 3, 4, 5])
+
+    def test_client_ids_never_reused(self):
+        self.db.add_client("node", "key_a")
+        self.db.add_client("node", "key_b")
+        deleted_id = self.db.get_client_by_api_key("key_b").client_id
+        self.db.delete_client("key_b")
+        self.db.add_client("node", "key_c")
+        self.assertGreater(self.db.get_client_by_api_key("key_c").client_id, deleted_id)
+
+    def test_bulk_releases_unused_ids(self):
+        self.db.add_clients_bulk({"name": "node", "key": f"key_{i}"} for i in range(3))
+        self.db.add_client("node", "key_x")
+        self.assertEqual(self.db.get_client_by_api_key("key_x").client_id, 4)
+
+    def test_iter_clients(self):
+        self.db.add_clients_bulk({"name": "node", "key": f"key_{i}"} for i in range(5))
+        batches = list(self.db.iter_clients(batch_size=2))
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+
+
+class TestAsyncClientDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.db = ClientDatabase(config={"module": "hivemind-json-db-plugin",
+                                         "hivemind-json-db-plugin": {"name": ".hivemind-async-test"}})
+        self.async_db = AsyncClientDatabase(self.db)
+
+    def tearDown(self):
+        self.async_db.shutdown()
+        for path in [self.db.db._db.path, self.db.id_sequence.path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_future_variants(self):
+        self.assertTrue(self.async_db.add_client_future("node", "key_a").result(timeout=5))
+        self.assertTrue(os.path.exists(self.db.db._db.path))  # committed
+        client = self.async_db.get_client_by_api_key_future("key_a").result(timeout=5)
+        self.assertEqual(client.name, "node")
+
+    def test_awaitable_variants(self):
+        async def run():
+            await self.async_db.aadd_client("node", "key_a")
+            return await self.async_db.aget_clients_by_name("node")
+
+        clients = asyncio.run(run())
+        self.assertEqual([c.api_key for c in clients], ["key_a"])
+
+
+class TestClientDatabaseJournal(unittest.TestCase):
+    config = {"module": "hivemind-json-db-plugin",
+              "journal": True,
+              "journal_compact_entries": 5,
+              "hivemind-json-db-plugin": {"name": ".hivemind-journal-test"}}
+
+    def setUp(self):
+        self.db = ClientDatabase(config=self.config)
+
+    def tearDown(self):
+        for path in [self.db.db._db.path, self.db.journal.path, self.db.id_sequence.path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_journal_next_to_snapshot(self):
+        self.assertEqual(self.db.journal.path, f"{self.db.db._db.path}.journal")
+
+    def test_commit_appends_to_journal(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+        self.assertFalse(os.path.exists(self.db.db._db.path))
+        self.assertEqual(self.db.journal.entries, 1)
+        self.assertGreater(self.db.journal.size(), 0)
+
+    def test_replay_on_startup(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+            self.db.add_client("node", "key_b")
+        with self.db:
+            self.db.delete_client("key_b")
+        db = ClientDatabase(config=self.config)
+        self.assertEqual(db.get_client_by_api_key("key_a").name, "node")
+        self.assertIsNone(db.get_client_by_api_key("key_b"))
+
+    def test_compaction(self):
+        for i in range(5):
+            with self.db:
+                self.db.add_client(f"node{i}", f"key_{i}")
+        self.assertTrue(os.path.exists(self.db.db._db.path))
+        self.assertEqual(self.db.journal.size(), 0)
+        db = ClientDatabase(config=self.config)
+        self.assertEqual(len(db.get_clients_by_name("node4")), 1)
+
+    def test_refresh_replays_journal_tail(self):
+        self.db.sync_interval = 0
+        with self.db:
+            self.db.add_client("node", "key_a")
+        other = ClientDatabase(config=self.config)
+        with other:
+            other.add_client("cli", "key_b")
+        self.assertTrue(self.db.refresh())
+        self.assertEqual(self.db.get_client_by_api_key("key_b").name, "cli")
+
+    def test_compaction_keeps_foreign_snapshot(self):
+        for i in range(4):
+            with self.db:
+                self.db.add_client(f"node{i}", f"key_{i}")
+        # admin CLI process adds a client, its commit compacts the journal into a new snapshot
+        cli = multiprocessing.get_context("fork").Process(target=_add_client, args=(self.config, "cli", "key_cli"))
+        cli.start()
+        cli.join(10)
+        self.assertEqual(cli.exitcode, 0)
+        self.assertTrue(os.path.exists(self.db.db._db.path))
+        # our next commit compacts too, it must not write our stale snapshot over the CLI one
+        with self.db:
+            self.db.add_client("node4", "key_4")
+        fresh = ClientDatabase(config=self.config)
+        self.assertEqual(fresh.get_client_by_api_key("key_cli").name, "cli")
+        self.assertEqual(fresh.get_client_by_api_key("key_4").name, "node4")
+        self.assertEqual(self.db.get_client_by_api_key("key_cli").name, "cli")
+
+
+def _add_client(config, name, key):
+    db = ClientDatabase(config=config)
+    with db:
+        db.add_client(name, key)
+
+
+class _RemoteDB(AbstractDB):
+    """stand-in for a network backend (eg. redis), no files to fingerprint"""
+
+    def __init__(self, **kwargs):
+        self.clients = {}
+        self.scans = 0
+
+    def add_item(self, client):
+        self.clients[client.client_id] = client
+        return True
+
+    def search_by_value(self, key, val):
+        return [c for c in self.clients.values() if c.__dict__.get(key) == val]
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __iter__(self):
+        self.scans += 1
+        return iter(list(self.clients.values()))
+
+
+class TestStamplessClientDatabase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(database.BUILTIN_DATABASES, {"remote-test": _RemoteDB})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db = ClientDatabase(config={"module": "remote-test", "remote-test": {"name": ".hivemind-remote-test"}})
+        self.db.sync_interval = 0
+
+    def tearDown(self):
+        if os.path.exists(self.db.id_sequence.path):
+            os.remove(self.db.id_sequence.path)
+
+    def test_never_scanned_after_load(self):
+        self.assertFalse(self.db.in_memory_index)
+        scans = self.db.db.scans
+        with self.db:
+            self.db.add_client("node", "key_a")
+        generation = self.db.generation
+        self.assertTrue(self.db.refresh())
+        self.db.sync()
+        self.assertEqual(self.db.db.scans, scans)
+        # permissions are looked up again after every check
+        self.assertGreater(self.db.generation, generation)
+        self.assertEqual(self.db.get_client_by_api_key("key_a").name, "node")
+
+
+class TestSQLiteClientDatabase(unittest.TestCase):
+    config = {"module": "hivemind-core-sqlite-db",
+              "hivemind-core-sqlite-db": {"name": ".hivemind-sqlite-test"}}
+
+    def setUp(self):
+        self.db = ClientDatabase(config=self.config)
+
+    def tearDown(self):
+        for path in self.db.db.storage_paths + [self.db.db.path + "-shm", self.db.id_sequence.path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_add_and_search(self):
+        with self.db:
+            self.db.add_client("node", "key_a", skill_blacklist=["skill"])
+        self.assertEqual(len(self.db.db.search_by_value("api_key", "key_a")), 1)
+        self.assertEqual(self.db.db.search_by_value("name", "node")[0].skill_blacklist, ["skill"])
+        self.assertEqual(self.db.total_clients(), 1)
+
+    def test_lookups_use_sql(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+            self.db.add_client("node", "key_b")
+        self.assertFalse(self.db.in_memory_index)
+        self.assertEqual(self.db._clients, {})  # rows are never mirrored in memory
+        client = self.db.get_client_by_api_key("key_a")
+        self.assertEqual(client.name, "node")
+        self.assertEqual(self.db.get_client_by_id(client.client_id).api_key, "key_a")
+        self.assertEqual([c.api_key for c in self.db.get_clients_by_name("node")], ["key_a", "key_b"])
+        with self.db:
+            self.db.delete_client("key_b")
+        self.assertIsNone(self.db.get_client_by_api_key("key_b"))
+        self.assertIsNone(self.db.get_client_by_api_key("revoked"))
+
+    def test_generation(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+        generation = self.db.generation
+        client = self.db.get_client_by_api_key("key_a")
+        client.last_seen = 1
+        self.db.update_item(client)
+        self.assertEqual(self.db.generation, generation)
+        client.skill_blacklist = ["skill"]
+        self.db.update_item(client)
+        self.assertEqual(self.db.generation, generation + 1)
+
+    def test_close(self):
+        with self.db:
+            self.db.add_client("node", "key_a")
+        self.db.close()
+        self.assertEqual(self.db.db._conns, [])
+        self.assertEqual(self.db.get_client_by_api_key("key_a").name, "node")  # reconnects on demand
+
+    def test_password_rejected(self):
+        with self.assertRaises(ValueError):
+            ClientDatabase(config={"module": "hivemind-core-sqlite-db",
+                                   "hivemind-core-sqlite-db": {"name": ".hivemind-sqlite-test",
+                                                               "password": "secret"}})
+
+    def test_journal_ignored(self):
+        db = ClientDatabase(config={**self.config, "journal": True})
+        self.assertIsNone(db.journal)
+        with db:
+            db.add_client("node", "key_a")
+        self.assertEqual(self.db.total_clients(), 1)
+
+    def test_concurrent_writer(self):
+        self.db.sync_interval = 0
+        with self.db:
+            self.db.add_client("node", "key_a")
+        # admin CLI writing to the same store from another connection
+        other = ClientDatabase(config=self.config)
+        with other:
+            other.add_client("cli", "key_b")
+        self.assertTrue(self.db.refresh())
+        self.assertEqual(self.db.get_client_by_api_key("key_b").name, "cli")
+
+
+if __name__ == '__main__':
+    unittest.main()
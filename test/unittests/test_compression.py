@@ -0,0 +1,41 @@
+import unittest
+import zlib
+
+from hivemind_core.compression import (CompressionSettings, DecompressionError, SupportedCompression,
+                                       compress, decompress, pack_bin, unpack_bin)
+
+
+class TestCompression(unittest.TestCase):
+    cfg = {"algorithms": ["zlib", "lzma"], "levels": {"lzma": 1}, "threshold": 10, "max_size": 1000}
+
+    def test_negotiate(self):
+        settings = CompressionSettings.negotiate(["brotli", "lzma", "zlib"], self.cfg)
+        self.assertEqual(settings.algo, SupportedCompression.LZMA)
+        self.assertEqual(settings.level, 1)
+        self.assertIsNone(CompressionSettings.negotiate(["brotli"], self.cfg))
+        self.assertIsNone(CompressionSettings.negotiate(["zlib"], {"algorithms": []}))
+
+    def test_roundtrip(self):
+        data = b"hello world " * 50
+        for algo in SupportedCompression:
+            self.assertEqual(decompress(compress(data, algo), algo, max_size=len(data)), data)
+
+    def test_bomb_rejected(self):
+        bomb = zlib.compress(b"\0" * 10_000_000)
+        with self.assertRaises(DecompressionError):
+            decompress(bomb, SupportedCompression.ZLIB, max_size=1000)
+        with self.assertRaises(DecompressionError):
+            decompress(b"not compressed", SupportedCompression.ZLIB, max_size=1000)
+
+    def test_bin_header(self):
+        settings = CompressionSettings(algo=SupportedCompression.ZLIB, threshold=10)
+        self.assertEqual(pack_bin(b"short", settings), b"\x00short")
+        packed = pack_bin(b"x" * 100, settings)
+        self.assertEqual(packed[:1], b"\x01")
+        self.assertEqual(unpack_bin(packed, 1000), (b"x" * 100, SupportedCompression.ZLIB))
+        with self.assertRaises(DecompressionError):
+            unpack_bin(b"\x07data", 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
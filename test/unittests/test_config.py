@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from hivemind_core import config
+
+
+class TestConfigSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        env = mock.patch.dict(os.environ, {"XDG_CONFIG_HOME": self.tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        # fresh cache, polling only, the inotify watcher would make the tests timing dependent
+        state = mock.patch.multiple(config, _snapshot=None, _snapshot_stamp=None,
+                                    _last_check=0.0, _watcher=False, _changed=False)
+        state.start()
+        self.addCleanup(state.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, **changes):
+        path = config._snapshot_path()
+        with open(path) as f:
+            data = json.load(f)
+        data.update(changes)
+        with open(path, "w") as f:
+            json.dump(data, f)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))  # coarse mtime filesystems
+
+    def test_creates_defaults(self):
+        snapshot = config.get_config_snapshot()
+        self.assertTrue(os.path.isfile(config._snapshot_path()))
+        self.assertEqual(snapshot["binarize"], config._DEFAULT["binarize"])
+        self.assertEqual(snapshot["allowed_ciphers"], tuple(config._DEFAULT["allowed_ciphers"]))
+
+    def test_read_only(self):
+        snapshot = config.get_config_snapshot()
+        with self.assertRaises(TypeError):
+            snapshot["binarize"] = True
+        with self.assertRaises(TypeError):
+            snapshot["batch"]["window"] = 1
+
+    def test_cached(self):
+        self.assertIs(config.get_config_snapshot(), config.get_config_snapshot())
+
+    def test_stale_until_check_interval(self):
+        snapshot = config.get_config_snapshot()
+        self.write(binarize=True)
+        self.assertIs(config.get_config_snapshot(), snapshot)
+        with mock.patch.object(config, "CONFIG_CHECK_INTERVAL", 0):
+            self.assertTrue(config.get_config_snapshot()["binarize"])
+
+    def test_unchanged_file_not_reloaded(self):
+        snapshot = config.get_config_snapshot()
+        with mock.patch.object(config, "CONFIG_CHECK_INTERVAL", 0):
+            self.assertIs(config.get_config_snapshot(), snapshot)
+
+    def test_watcher_invalidates(self):
+        snapshot = config.get_config_snapshot()
+        self.write(binarize=True)
+        config._on_config_changed(config._snapshot_path())
+        reloaded = config.get_config_snapshot()
+        self.assertIsNot(reloaded, snapshot)
+        self.assertTrue(reloaded["binarize"])
+
+    def test_watcher_ignores_other_files(self):
+        config.get_config_snapshot()
+        config._on_config_changed(os.path.join(self.tmp.name, "other.json"))
+        self.assertFalse(config._changed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+
+from hivemind_core.dedup import BloomFilter, DedupCache
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"id-{i}")
+        self.assertTrue(all(f"id-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class TestDedupCache(unittest.TestCase):
+    def test_seen(self):
+        cache = DedupCache()
+        self.assertFalse(cache.seen("a"))
+        self.assertTrue(cache.seen("a"))
+        self.assertIn("a", cache)
+
+    def test_evicts_oldest_first(self):
+        cache = DedupCache(capacity=3)
+        for msg_id in "abcd":
+            cache.seen(msg_id)
+        self.assertNotIn("a", cache)
+        # the ids of an active flood are not evicted at random
+        self.assertTrue(all(msg_id in cache for msg_id in "bcd"))
+
+    def test_ttl(self):
+        cache = DedupCache(ttl=10)
+        with mock.patch("hivemind_core.dedup.time.monotonic", return_value=1000):
+            cache.seen("a")
+        with mock.patch("hivemind_core.dedup.time.monotonic", return_value=1005):
+            self.assertTrue(cache.seen("a"))
+        with mock.patch("hivemind_core.dedup.time.monotonic", return_value=1011):
+            self.assertFalse(cache.seen("a"))
+
+    def test_bloom_remembers_evicted_ids(self):
+        cache = DedupCache(capacity=2, bloom_capacity=100)
+        for msg_id in "abc":
+            cache.seen(msg_id)
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.seen("a"))
+
+    def test_bloom_full_generation_keeps_ttl(self):
+        cache = DedupCache(ttl=10, capacity=1, bloom_capacity=2, bloom_generations=4)
+        with mock.patch("hivemind_core.dedup.time.monotonic", return_value=1000):
+            for msg_id in "abcdef":  # fills three generations
+                cache.seen(msg_id)
+        with mock.patch("hivemind_core.dedup.time.monotonic", return_value=1009):
+            self.assertTrue(all(msg_id in cache for msg_id in "abcde"))
+        with mock.patch("hivemind_core.dedup.time.monotonic", return_value=1010):
+            self.assertFalse(any(msg_id in cache for msg_id in "abcdef"))
+            self.assertEqual(len(cache._blooms), 0)
+
+    def test_bloom_generations_bounded(self):
+        cache = DedupCache(ttl=10, capacity=1, bloom_capacity=2, bloom_generations=2)
+        with mock.patch("hivemind_core.dedup.time.monotonic", return_value=1000):
+            for msg_id in "abcdef":
+                cache.seen(msg_id)
+            self.assertEqual(len(cache._blooms), 2)
+            # above the documented rate the oldest generation goes first
+            self.assertNotIn("a", cache)
+            self.assertIn("c", cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from Cryptodome.PublicKey import RSA
+from poorman_handshake import HandShake, PasswordHandShake
+
+from hivemind_core.handshake import HandshakePool, handshake_from_key, password_handshake, rsa_handshake
+
+
+class TestHandshakeWorkers(unittest.TestCase):
+    def test_password_handshake(self):
+        client = PasswordHandShake("secret")
+        envelope = client.generate_handshake()
+        envelope_out, secret, state = password_handshake("secret", envelope)
+        client.receive_handshake(envelope_out)
+        self.assertEqual(secret, client.secret)
+        self.assertEqual(set(state), {"iv", "salt"})
+
+    def test_handshake_from_parsed_key(self):
+        key = RSA.generate(2048)
+        shake = handshake_from_key(key)
+        self.assertIs(shake.private_key, key)
+        self.assertIsNone(shake.secret)
+        self.assertEqual(shake.pubkey, key.public_key().export_key(format="PEM").decode("utf-8"))
+
+    def test_rsa_handshake(self):
+        server_key = RSA.generate(2048)
+        client = HandShake()
+        for key in (server_key, server_key.export_key(format="PEM").decode("utf-8")):
+            client.secret = bytes(32)  # received secret is xored into this
+            envelope, secret, _ = rsa_handshake(key, client.pubkey)
+            client.receive_and_verify(envelope, server_key.public_key().export_key(format="PEM").decode("utf-8"))
+            self.assertEqual(client.secret, secret)
+
+
+class TestHandshakePool(unittest.TestCase):
+    def test_disabled_by_default(self):
+        self.assertIsNone(HandshakePool.from_config({}))
+        self.assertIsNone(HandshakePool.from_config({"workers": 0}))
+
+    def test_thread_pool(self):
+        pool = HandshakePool.from_config({"workers": 2, "mode": "thread"})
+        try:
+            clients = [PasswordHandShake("secret") for _ in range(4)]
+            futures = [pool.submit(password_handshake, "secret", c.generate_handshake()) for c in clients]
+            for client, future in zip(clients, futures):
+                envelope_out, secret, _ = future.result(timeout=30)
+                client.receive_handshake(envelope_out)
+                self.assertEqual(secret, client.secret)
+        finally:
+            pool.shutdown(wait=True)
+
+    def test_process_pool_sends_pem(self):
+        pool = HandshakePool(workers=1, mode="process")
+        try:
+            server_key = RSA.generate(2048)
+            client = HandShake()
+            envelope, secret, _ = pool.submit(rsa_handshake, server_key, client.pubkey).result(timeout=60)
+            client.secret = bytes(32)
+            client.receive_handshake(envelope)
+            self.assertEqual(client.secret, secret)
+        finally:
+            pool.shutdown(wait=True)
+
+    def test_pem_exported_once(self):
+        pool = HandshakePool(workers=1, mode="process")
+        try:
+            server_key = RSA.generate(2048)
+            with mock.patch.object(server_key, "export_key", wraps=server_key.export_key) as export:
+                self.assertEqual(pool._pem(server_key), pool._pem(server_key))
+            export.assert_called_once()
+        finally:
+            pool.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import unittest
+
+from hivemind_core.images import FrameBatcher, decode_numpy_image, np
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestNumpyImage(unittest.TestCase):
+
+    def test_decode_without_copy(self):
+        frame = np.arange(24, dtype=np.uint16).reshape(2, 3, 4)
+        data = frame.tobytes()
+        image = decode_numpy_image(memoryview(data), {"shape": [2, 3, 4], "dtype": "uint16"})
+        self.assertTrue(np.array_equal(image, frame))
+        self.assertFalse(image.flags.owndata)
+        self.assertFalse(image.flags.writeable)
+
+    def test_no_shape(self):
+        self.assertIsNone(decode_numpy_image(b"\0" * 12, {"camera_id": "cam"}))
+
+    def test_size_mismatch(self):
+        with self.assertRaises(ValueError):
+            decode_numpy_image(b"\0" * 10, {"shape": [2, 3], "dtype": "uint8"})
+
+
+class TestFrameBatcher(unittest.TestCase):
+
+    def test_batches_per_camera(self):
+        batches = []
+        batcher = FrameBatcher(lambda frames, cam, client: batches.append((cam, frames)),
+                               batch_size=2, max_delay=60)
+        client = object()
+        batcher.add(1, "front", client)
+        batcher.add(2, "back", client)
+        batcher.add(3, "front", client)
+        self.assertEqual(batches, [("front", [1, 3])])
+        batcher.discard(client)
+        self.assertEqual(batcher._frames, {})
+
+    def test_delay_flush(self):
+        done = threading.Event()
+        batches = []
+
+        def cb(frames, cam, client):
+            batches.append(frames)
+            done.set()
+
+        batcher = FrameBatcher(cb, batch_size=10, max_delay=0.01)
+        batcher.add("frame", "cam", object())
+        self.assertTrue(done.wait(2))
+        self.assertEqual(batches, [["frame"]])
+
+    def test_no_thread_per_camera(self):
+        batcher = FrameBatcher(lambda frames, cam, client: None, batch_size=10, max_delay=60)
+        threads = threading.active_count()
+        client = object()
+        for i in range(20):
+            batcher.add("frame", f"cam{i}", client)
+        self.assertLessEqual(threading.active_count(), threads + 1)  # at most the shared scheduler
+        timers = list(batcher._timers.values())
+        batcher.discard(client)
+        self.assertTrue(all(t.cancelled for t in timers))
+        batcher.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
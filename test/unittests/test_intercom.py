@@ -0,0 +1,53 @@
+import base64
+import unittest
+from unittest import mock
+
+from Cryptodome.PublicKey import RSA
+from poorman_handshake.asymmetric.utils import encrypt_RSA
+
+from hivemind_bus_client.encryption import SupportedCiphers
+from hivemind_core.intercom import IntercomCrypto, encrypt_intercom
+
+
+class TestIntercomCrypto(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.key = RSA.generate(2048)
+        cls.pub = cls.key.public_key()
+
+    def test_rsa_payload(self):
+        payload = {"ciphertext": base64.b64encode(encrypt_RSA(self.pub, "hello")).decode(), "signature": ""}
+        self.assertEqual(IntercomCrypto(self.key).decrypt(payload), "hello")
+
+    def test_hybrid_large_payload(self):
+        body = "x" * 100_000  # far beyond what RSA can encrypt
+        for cipher in (SupportedCiphers.AES_GCM, SupportedCiphers.CHACHA20_POLY1305):
+            payload, _ = encrypt_intercom(self.pub, body, cipher=cipher)
+            self.assertEqual(IntercomCrypto(self.key).decrypt(payload), body)
+
+    def test_session_key_cached(self):
+        engine = IntercomCrypto(self.key, cache_size=2)
+        payload, session_key = encrypt_intercom(self.pub, "one")
+        engine.decrypt(payload, sender="a")
+        payload2, _ = encrypt_intercom(self.pub, "two", session_key=session_key)
+        with mock.patch("hivemind_core.intercom.decrypt_RSA") as rsa:
+            self.assertEqual(engine.decrypt(payload2, sender="a"), "two")
+            rsa.assert_not_called()
+
+        engine.forget("a")
+        self.assertEqual(len(engine._keys), 0)
+
+    def test_cache_is_bounded(self):
+        engine = IntercomCrypto(self.key, cache_size=2)
+        for i in range(3):
+            engine.decrypt(encrypt_intercom(self.pub, str(i))[0], sender="a")
+        self.assertEqual(len(engine._keys), 2)
+
+    def test_wrong_key(self):
+        payload, _ = encrypt_intercom(RSA.generate(2048).public_key(), "hello")
+        with self.assertRaises(Exception):
+            IntercomCrypto(self.key).decrypt(payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import threading
+import time
+import unittest
+
+from hivemind_core.outbound import OutboundWriterPool, OverflowPolicy
+
+
+class TestOutboundQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = self._pool()
+        self.release = threading.Event()  # unblocks every slow writer
+        self.sent = []
+        self.disconnected = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def _pool(self, **kwargs):
+        pool = OutboundWriterPool(**{"workers": 2, "max_size": 3, **kwargs})
+        self.addCleanup(pool.shutdown, True)
+        return pool
+
+    def _blocked_queue(self, pool):
+        """queue whose writer is stuck until self.release is set"""
+
+        def send(payload, is_bin):
+            self.release.wait(5)
+            self.sent.append(payload)
+
+        q = pool.create_queue(send, self.disconnected.set)
+        q.put("first", False)
+        while q.depth:  # wait for the writer to pick it up and block
+            time.sleep(0.01)
+        return q
+
+    def _wait_drained(self, q):
+        for _ in range(500):
+            if not q.depth and not q._scheduled:
+                return
+            time.sleep(0.01)
+
+    def test_order_preserved(self):
+        sent = []
+        q = self.pool.create_queue(lambda p, b: sent.append(p), lambda: None)
+        for i in range(3):
+            q.put(str(i), False)
+        self._wait_drained(q)
+        self.assertEqual(sent, ["0", "1", "2"])
+
+    def test_drop_oldest(self):
+        q = self._blocked_queue(self.pool)
+        for i in range(5):
+            self.assertTrue(q.put(str(i), False))
+        self.assertEqual(q.depth, 3)
+        self.assertEqual(q.dropped, 2)
+        self.release.set()
+        self._wait_drained(q)
+        self.assertEqual(self.sent, ["first", "2", "3", "4"])
+
+    def test_drop_type(self):
+        q = self._blocked_queue(self._pool(overflow=OverflowPolicy.DROP_TYPE, droppable_types=["ping"]))
+        q.put("a", False, (("bus", "speak"),))
+        q.put("p", False, (("ping", ""),))
+        q.put("b", False, (("bus", "speak"),))
+        self.assertTrue(q.put("c", False, (("bus", "speak"),)))  # evicts the queued ping
+        self.assertFalse(q.put("p2", False, (("ping", ""),)))  # nothing droppable queued, new ping dropped
+        self.release.set()
+        self._wait_drained(q)
+        self.assertEqual(self.sent, ["first", "a", "b", "c"])
+        self.assertFalse(self.disconnected.is_set())
+
+    def test_drop_type_keeps_mixed_batch(self):
+        q = self._blocked_queue(self._pool(overflow=OverflowPolicy.DROP_TYPE, droppable_types=["ping"]))
+        q.put("batch", False, (("ping", ""), ("bus", "speak")))
+        q.put("a", False, (("bus", "speak"),))
+        q.put("pings", False, (("ping", ""), ("ping", "")))
+        self.assertTrue(q.put("b", False, (("bus", "speak"),)))  # evicts the all-ping batch, not the mixed one
+        self.assertFalse(q.put("c", False, (("bus", "speak"),)))  # a mixed batch is never dropped
+        self.assertTrue(q.closed)
+        self.release.set()
+        self.assertTrue(self.disconnected.wait(5))
+        self.assertEqual(self.sent, ["first"])
+
+    def test_disconnect(self):
+        q = self._blocked_queue(self._pool(overflow=OverflowPolicy.DISCONNECT))
+        for i in range(4):
+            q.put(str(i), False)
+        self.assertTrue(q.closed)
+        self.assertFalse(q.put("late", False))
+        self.release.set()
+        self.assertTrue(self.disconnected.wait(5))
+        self.assertEqual(self.sent, ["first"])
+
+    def test_drop_type_disconnects_without_droppable(self):
+        q = self._blocked_queue(self._pool(overflow=OverflowPolicy.DROP_TYPE, droppable_types=["ping"]))
+        for i in range(3):
+            q.put(str(i), False, (("bus", "speak"),))
+        self.assertFalse(q.put("3", False, (("bus", "speak"),)))
+        self.assertTrue(q.closed)
+        self.release.set()
+        self.assertTrue(self.disconnected.wait(5))
+        self.assertEqual(self.sent, ["first"])
+
+    def test_slow_client_does_not_block_others(self):
+        pool = self._pool(send_timeout=0.2)
+        # as many blocked clients as there are writers
+        slow = [self._blocked_queue(pool) for _ in range(pool.workers)]
+        fast = []
+        q_fast = pool.create_queue(lambda p, b: fast.append(p), lambda: None)
+        q_fast.put("hello", False)
+        self._wait_drained(q_fast)
+        self.assertEqual(fast, ["hello"])
+        # blocked clients are given up on, their writers replaced
+        for _ in range(100):
+            if all(q.closed for q in slow):
+                break
+            time.sleep(0.01)
+        self.assertTrue(all(q.closed for q in slow))
+        self.assertTrue(self.disconnected.is_set())
+        self.assertEqual(self.sent, [])
+
+    def test_no_send_timeout(self):
+        pool = self._pool(workers=1, send_timeout=0)
+        q = self._blocked_queue(pool)
+        time.sleep(0.3)
+        self.assertFalse(q.closed)
+        self.release.set()
+        self._wait_drained(q)
+        self.assertEqual(self.sent, ["first"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,381 @@
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from ovos_bus_client.message import Message
+
+from hivemind_bus_client.encryption import SupportedCiphers, SupportedEncodings, decrypt_bin, decrypt_from_json
+from hivemind_bus_client.message import HiveMessage, HiveMessageType, HiveMindBinaryPayloadType
+from hivemind_bus_client.serialization import decode_bitstring, get_bitstring
+from hivemind_core.compression import CompressionSettings, SupportedCompression
+from hivemind_core.protocol import (ClientPolicy, CryptoNegotiation, HiveMindClientConnection, WireMessage,
+                                    BroadcastGroup, HiveMessageBatch, AdaptiveBinarization,
+                                    decode_binary_frame, HiveMindListenerProtocol)
+
+
+KEY = "0123456789abcdef"
+ZLIB_1000 = CompressionSettings(SupportedCompression.ZLIB, threshold=1000)
+
+
+def _connection(sent, **kwargs):
+    """encrypted client connection, every (payload, is_bin) written to it is appended to `sent`"""
+    kwargs.setdefault("crypto_key", KEY)
+    return HiveMindClientConnection(key="k", send_msg=lambda p, b: sent.append((p, b)),
+                                    disconnect=lambda: None, handshake=mock.Mock(), **kwargs)
+
+
+class TestClientPolicy(unittest.TestCase):
+
+    def test_policy_is_immutable(self):
+        policy = ClientPolicy(allowed_types=frozenset(["speak"]))
+        with self.assertRaises(Exception):
+            policy.allowed_types = frozenset()
+
+    def test_merge_session_blacklist(self):
+        policy = ClientPolicy(skill_blacklist=("a", "b"), intent_blacklist=("x:y",))
+        self.assertEqual(policy.merge_skill_blacklist(["b", "c"]), ["b", "c", "a"])
+        self.assertEqual(policy.merge_intent_blacklist([]), ["x:y"])
+
+    def test_merged_lists_are_not_shared(self):
+        policy = ClientPolicy(skill_blacklist=("a",))
+        merged = policy.merge_skill_blacklist([])
+        merged.append("z")
+        self.assertEqual(policy.merge_skill_blacklist([]), ["a"])
+
+    def test_policy_looked_up_once_per_message(self):
+        conn = HiveMindClientConnection(key="k", send_msg=lambda p, b: None, disconnect=lambda: None,
+                                        allowed_types=["speak"])
+        proto = mock.Mock(agent_bus_callback=None)
+        proto._refresh_policy.return_value = ClientPolicy(skill_blacklist=("a",))
+        proto._update_blacklist = lambda m, c, p=None: HiveMindListenerProtocol._update_blacklist(proto, m, c, p)
+        HiveMindListenerProtocol.handle_inject_agent_msg(proto, Message("speak"), conn)
+        proto._refresh_policy.assert_called_once_with(conn)
+        emitted = proto.get_bus.return_value.emit.call_args[0][0]
+        self.assertIn("a", emitted.context["session"]["blacklisted_skills"])
+
+
+class TestCryptoNegotiation(unittest.TestCase):
+    cfg = {"allowed_encodings": ["JSON-B91", "JSON-HEX", "JSON-B64"],
+           "allowed_ciphers": ["AES-GCM", "CHACHA20-POLY1305", "INVALID"]}
+
+    def test_client_preference(self):
+        negotiation = CryptoNegotiation.from_config(self.cfg)
+        self.assertEqual(negotiation.ciphers, (SupportedCiphers.AES_GCM, SupportedCiphers.CHACHA20_POLY1305))
+        self.assertEqual(negotiation.select_encoding(["JSON-Z85B", "JSON-B91", "JSON-B64"]),
+                         SupportedEncodings.JSON_B91)
+        self.assertEqual(negotiation.select_cipher([SupportedCiphers.CHACHA20_POLY1305]),
+                         SupportedCiphers.CHACHA20_POLY1305)
+
+    def test_nothing_allowed(self):
+        negotiation = CryptoNegotiation.from_config(self.cfg)
+        self.assertIsNone(negotiation.select_encoding(["JSON-Z85B", "NOT-AN-ENCODING"]))
+
+    def test_prefer_cheapest(self):
+        negotiation = CryptoNegotiation.from_config({**self.cfg, "prefer_cheapest_crypto": True})
+        self.assertEqual(negotiation.select_encoding(["JSON-B91", "JSON-HEX", "JSON-B64"]),
+                         SupportedEncodings.JSON_B64)
+
+
+class TestLazyHandshake(unittest.TestCase):
+
+    def test_no_rsa_handshake_until_requested(self):
+        conn = HiveMindClientConnection(key="k", send_msg=lambda p, b: None, disconnect=lambda: None,
+                                        crypto_key="0123456789abcdef")
+        self.assertIsNone(conn.handshake)
+
+    def test_unusable_identity_key_disconnects(self):
+        proto = mock.Mock()
+        type(proto).identity_key = mock.PropertyMock(side_effect=ValueError("corrupt key"))
+        disconnect = mock.Mock()
+        conn = HiveMindClientConnection(key="k", send_msg=lambda p, b: None, disconnect=disconnect)
+        HiveMindListenerProtocol.handle_handshake_message(
+            proto, HiveMessage(HiveMessageType.HANDSHAKE, payload={"pubkey": "pem"}), conn)
+        self.assertIsNone(conn.handshake)
+        disconnect.assert_called_once()
+        proto.handshake_pool.submit.assert_not_called()
+
+
+class TestWireMessage(unittest.TestCase):
+
+    def test_serialized_once_per_format(self):
+        sent = []
+        peers = [_connection(sent), _connection(sent), _connection(sent, binarize=True)]
+        msg = HiveMessage(HiveMessageType.BUS, Message("speak", {"utterance": "hello"}))
+        wire = WireMessage(msg)
+        with mock.patch.object(HiveMessage, "serialize", autospec=True,
+                               side_effect=lambda m: m.as_json) as serialize, \
+                mock.patch("hivemind_core.protocol.get_bitstring", wraps=get_bitstring) as bits:
+            for peer in peers:
+                peer.send(wire)
+        self.assertEqual(serialize.call_count, 1)
+        self.assertEqual(bits.call_count, 1)
+        self.assertEqual(len(sent), 3)
+        # every peer still gets its own ciphertext that decodes to the original message
+        for payload, is_bin in sent:
+            if is_bin:
+                plain = decode_bitstring(decrypt_bin(key=KEY, ciphertext=payload,
+                                                     cipher=SupportedCiphers.AES_GCM))
+            else:
+                plain = HiveMessage.deserialize(decrypt_from_json(key=KEY, ciphertext_json=payload,
+                                                                  encoding=SupportedEncodings.JSON_HEX,
+                                                                  cipher=SupportedCiphers.AES_GCM))
+            self.assertEqual(plain.payload.data["utterance"], "hello")
+
+    def test_responsive_ping_serialized_once(self):
+        sent = []
+        proto = mock.Mock(peer="node", broadcast_group=BroadcastGroup())
+        proto.identity.site_id = "site"
+        proto.clients = {str(i): _connection(sent) for i in range(3)}
+        proto._seen_flood_ids.seen.return_value = False
+        proto.fan_out = lambda m, exclude=None: HiveMindListenerProtocol.fan_out(proto, m, exclude)
+        ping = HiveMessage(HiveMessageType.PING, {"flood_id": "f1", "peer": "other"})
+        with mock.patch.object(HiveMessage, "serialize", autospec=True,
+                               side_effect=lambda m: m.as_json) as serialize:
+            HiveMindListenerProtocol.handle_ping_message(proto, ping, proto.clients["0"])
+        self.assertEqual(serialize.call_count, 1)
+        self.assertEqual(len(sent), 3)
+
+    def test_blacklist_applies_per_peer(self):
+        sent = []
+        peer = _connection(sent)
+        peer.msg_blacklist = ["speak"]
+        peer.send(WireMessage(HiveMessage(HiveMessageType.BUS, Message("speak"))))
+        self.assertEqual(sent, [])
+
+
+class TestBroadcastGroup(unittest.TestCase):
+
+    def test_rotates_on_membership_change(self):
+        distributed = []
+        group = BroadcastGroup(distribute=lambda k, members: distributed.append((k, members)))
+        a, b = _connection([]), _connection([])
+        group.join(a)
+        k0 = group.key()
+        self.assertEqual(distributed, [(k0, [a])])
+        group.join(b)
+        k1 = group.key()
+        self.assertEqual(distributed[-1], (k1, [a, b]))
+        self.assertNotEqual(k0.key, k1.key)
+        self.assertIs(group.key(), k1)  # no membership change, no rotation
+        self.assertTrue(group.leave(a))
+        k2 = group.key()
+        self.assertEqual(distributed[-1], (k2, [b]))
+        self.assertEqual(k2.key_id, 2)
+        self.assertFalse(group.leave(a))  # not a member anymore
+        group.leave(b)
+        self.assertIsNone(group.key())
+        self.assertEqual(len(distributed), 3)
+
+    def test_reconnect_storm_rotates_once(self):
+        distributed = []
+        group = BroadcastGroup(distribute=lambda k, members: distributed.append((k, members)))
+        peers = [_connection([]) for _ in range(50)]
+        for peer in peers:
+            group.join(peer)
+        group.leave(peers[0])
+        key = group.key()
+        self.assertEqual(distributed, [(key, peers[1:])])
+
+    def test_key_ids_distributed_in_order(self):
+        received = []
+        group = BroadcastGroup(distribute=lambda k, members: received.append(k.key_id))
+        peers = [_connection([]) for _ in range(8)]
+
+        def churn(peer):
+            for _ in range(20):
+                group.join(peer)
+                group.key()
+                group.leave(peer)
+                group.key()
+
+        group.join(_connection([]))  # keeps the group alive
+        threads = [threading.Thread(target=churn, args=(peer,)) for peer in peers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(received, sorted(received))
+        self.assertEqual(len(received), len(set(received)))
+
+    def test_members_share_ciphertext(self):
+        group = BroadcastGroup()
+        sent_a, sent_b, sent_c = [], [], []
+        a = _connection(sent_a)
+        b = _connection(sent_b, crypto_key="fedcba9876543210")
+        c = _connection(sent_c)  # never joined
+        group.join(a)
+        group.join(b)
+        k = group.key()
+        a.group_key_id = b.group_key_id = k.key_id
+        wire = WireMessage(HiveMessage(HiveMessageType.BUS, Message("speak", {"utterance": "hi"})),
+                           group=group.current)
+        for peer in (a, b, c):
+            peer.send(wire)
+        self.assertEqual(sent_a, sent_b)
+        self.assertEqual(json.loads(sent_a[0][0])["group_key_id"], k.key_id)
+        plain = decrypt_from_json(key=k.key, ciphertext_json=sent_a[0][0],
+                                  encoding=SupportedEncodings.JSON_HEX, cipher=SupportedCiphers.AES_GCM)
+        self.assertEqual(HiveMessage.deserialize(plain).payload.data["utterance"], "hi")
+        self.assertNotIn("group_key_id", json.loads(sent_c[0][0]))
+
+
+class TestBatchFrames(unittest.TestCase):
+
+    def test_batch_roundtrip(self):
+        sent = []
+        conn = _connection(sent, batch_window=60, batch_max=3)
+        for i in range(3):
+            conn.send(HiveMessage(HiveMessageType.BUS, Message("speak", {"utterance": str(i)})))
+        self.assertEqual(len(sent), 1)  # max_messages reached, flushed as a single frame
+        decoded = _connection([], batch_window=60).decode(sent[0][0])
+        self.assertIsInstance(decoded, HiveMessageBatch)
+        self.assertEqual([m.payload.data["utterance"] for m in decoded], ["0", "1", "2"])
+
+    def test_unbatchable_frame_flushes_pending(self):
+        sent = []
+        conn = _connection(sent, batch_window=60)
+        conn.send(HiveMessage(HiveMessageType.BUS, Message("speak", {"utterance": "first"})))
+        self.assertEqual(sent, [])
+        conn.send(HiveMessage(HiveMessageType.HELLO, {"peer": "x"}))  # never encrypted, never batched
+        self.assertEqual(len(sent), 2)
+        first = _connection([]).decode(sent[0][0])
+        self.assertEqual(first.payload.data["utterance"], "first")  # a single message is not wrapped
+        self.assertEqual(json.loads(sent[1][0])["msg_type"], "hello")
+
+    def test_window_timer_flushes(self):
+        sent = []
+        conn = _connection(sent, batch_window=0.2)
+        conn.send(HiveMessage(HiveMessageType.BUS, Message("speak")))
+        conn.send(HiveMessage(HiveMessageType.BUS, Message("speak")))
+        for _ in range(500):
+            if sent:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(_connection([], batch_window=60).decode(sent[0][0])), 2)
+
+    def test_batch_keeps_message_types(self):
+        conn = _connection([], batch_window=60)
+        conn.outbound = mock.Mock()
+        conn.send(HiveMessage(HiveMessageType.PING, {"flood_id": "x"}))
+        conn.send(HiveMessage(HiveMessageType.BUS, Message("speak")))
+        conn.flush_batch()
+        # a ping next to a speak must not make the whole frame droppable
+        self.assertEqual(conn.outbound.put.call_args[0][2], (("ping", ""), ("bus", "speak")))
+
+    def test_batch_rejected_unless_negotiated(self):
+        sent = []
+        conn = _connection(sent, batch_window=60, batch_max=2)
+        for _ in range(2):
+            conn.send(HiveMessage(HiveMessageType.BUS, Message("speak")))
+        with self.assertRaises(ValueError):
+            _connection([]).decode(sent[0][0])
+
+
+class TestCompressedFrames(unittest.TestCase):
+
+    def test_json_roundtrip(self):
+        sent = []
+        conn = _connection(sent, compression=ZLIB_1000)
+        conn.send(HiveMessage(HiveMessageType.BUS, Message("speak", {"utterance": "hi " * 500})))
+        conn.send(HiveMessage(HiveMessageType.BUS, Message("speak", {"utterance": "short"})))
+        self.assertEqual(json.loads(sent[0][0])["compression"], "zlib")
+        self.assertLess(len(sent[0][0]), 1500)
+        self.assertNotIn("compression", json.loads(sent[1][0]))  # below threshold
+        self.assertEqual(conn.decode(sent[0][0]).payload.data["utterance"], "hi " * 500)
+        self.assertEqual(conn.decode(sent[1][0]).payload.data["utterance"], "short")
+
+    def test_binary_roundtrip(self):
+        sent = []
+        conn = _connection(sent, compression=ZLIB_1000, binarize=True)
+        conn.send(HiveMessage(HiveMessageType.BUS, Message("speak", {"utterance": "hi " * 500})))
+        self.assertTrue(sent[0][1])
+        self.assertEqual(conn.decode(sent[0][0]).payload.data["utterance"], "hi " * 500)
+
+
+class TestAdaptiveBinarization(unittest.TestCase):
+
+    def test_format_per_message(self):
+        sent = []
+        conn = _connection(sent, binarize=True, adaptive=AdaptiveBinarization(min_size=1000))
+        small = HiveMessage(HiveMessageType.BUS, Message("speak"))
+        large = HiveMessage(HiveMessageType.BUS, Message("speak", {"utterance": "hi " * 500}))
+        for message in (small, large, large, large):
+            conn.send(message)
+        # small messages are always json, large ones measure both formats then pick the smaller one
+        self.assertEqual([is_bin for _, is_bin in sent], [False, True, False, True])
+        for payload, _ in sent:
+            self.assertEqual(conn.decode(payload).payload.msg_type, "speak")
+        stats = conn.wire_stats
+        self.assertEqual((stats["json_messages"], stats["bin_messages"]), (2, 2))
+        self.assertLess(stats["bin_ratio"], stats["json_ratio"])
+
+    def test_choice_depends_on_size_class(self):
+        adaptive = AdaptiveBinarization(min_size=10, min_saving=0.1, probe_interval=0)
+        adaptive.record(True, 100, 200, 0.001)  # small messages, bitstring header dominates
+        adaptive.record(False, 100, 150, 0.001)
+        adaptive.record(True, 10000, 8000, 0.001)
+        adaptive.record(False, 10000, 13000, 0.001)
+        self.assertFalse(adaptive.choose_binary(100))
+        self.assertTrue(adaptive.choose_binary(10000))
+
+    def test_losing_format_is_probed(self):
+        adaptive = AdaptiveBinarization(min_size=10, min_saving=0.1, probe_interval=4)
+        adaptive.record(True, 1000, 1100, 0.001)
+        adaptive.record(False, 1000, 1400, 0.001)
+        choices = [adaptive.choose_binary(1000) for _ in range(8)]
+        self.assertEqual(choices, [True, True, True, False] * 2)
+        for _ in range(20):  # the traffic changed, bitstrings got bigger
+            adaptive.record(True, 1000, 2000, 0.001)
+        self.assertFalse(adaptive.choose_binary(1000))
+
+    def test_concurrent_record(self):
+        adaptive = AdaptiveBinarization(min_size=10)
+
+        def send():
+            for _ in range(1000):
+                adaptive.record(adaptive.choose_binary(1000), 1000, 900, 0.0)
+
+        threads = [threading.Thread(target=send) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = adaptive.stats
+        self.assertEqual(stats["json_messages"] + stats["bin_messages"], 4000)
+        self.assertEqual(stats["bin_bytes"] + stats["json_bytes"], 4000 * 900)
+
+
+class TestZeroCopyBinary(unittest.TestCase):
+
+    def _frame(self, size=4096):
+        audio = bytes(range(256)) * (size // 256)
+        msg = HiveMessage(HiveMessageType.BINARY, audio, bin_type=HiveMindBinaryPayloadType.RAW_AUDIO,
+                          metadata={"sample_rate": 16000, "sample_width": 2})
+        return audio, msg
+
+    def test_payload_is_view(self):
+        audio, msg = self._frame()
+        frame = get_bitstring(hive_type=msg.msg_type, payload=msg.payload,
+                              hivemeta=msg.metadata, binary_type=msg.bin_type).bytes
+        decoded = decode_binary_frame(frame, zero_copy=True)
+        self.assertIsInstance(decoded.payload, memoryview)
+        self.assertEqual(decoded.payload.obj, frame)  # a slice of the frame, not a copy
+        self.assertEqual(bytes(decoded.payload), audio)
+        self.assertEqual(decoded.metadata["sample_rate"], 16000)
+        self.assertEqual(decoded.bin_type, HiveMindBinaryPayloadType.RAW_AUDIO)
+        self.assertIsInstance(decode_binary_frame(frame).payload, bytes)
+
+    def test_encrypted_roundtrip(self):
+        audio, msg = self._frame()
+        sent = []
+        conn = _connection(sent, zero_copy=True)
+        conn.send(msg)
+        decoded = conn.decode(sent[0][0])
+        self.assertIsInstance(decoded.payload, memoryview)
+        self.assertEqual(bytes(decoded.payload), audio)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import threading
+import unittest
+
+from hivemind_core.scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_runs_in_due_order(self):
+        scheduler = Scheduler()
+        calls, done = [], threading.Event()
+        scheduler.call_later(0.05, calls.append, "late")
+        scheduler.call_later(0.01, calls.append, "early")
+        scheduler.call_later(0.1, done.set)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(calls, ["early", "late"])
+
+    def test_cancel(self):
+        scheduler = Scheduler()
+        calls, done = [], threading.Event()
+        scheduler.call_later(0.01, calls.append, "cancelled").cancel()
+        scheduler.call_later(0.05, done.set)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(calls, [])
+
+    def test_single_thread(self):
+        scheduler = Scheduler()
+        threads, done = set(), threading.Event()
+        for _ in range(20):
+            scheduler.call_later(0.01, lambda: threads.add(threading.get_ident()))
+        scheduler.call_later(0.05, done.set)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(len(threads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import io
+import os
+import unittest
+from unittest import mock
+
+from hivemind_bus_client.message import HiveMessage, HiveMessageType, HiveMindBinaryPayloadType
+from hivemind_core.protocol import HiveMindListenerProtocol
+from hivemind_core.streams import SpoolBudget, StreamError, StreamReceiver, iter_stream_messages
+
+
+class TestStreams(unittest.TestCase):
+    data = os.urandom(10_000)
+
+    def _messages(self, chunk_size=4096):
+        return list(iter_stream_messages(io.BytesIO(self.data), HiveMindBinaryPayloadType.FILE,
+                                         {"file_name": "rec.wav"}, chunk_size=chunk_size))
+
+    def test_framing(self):
+        msgs = self._messages()
+        self.assertEqual([m.metadata["stream_event"] for m in msgs], ["begin", "chunk", "end"])
+        self.assertEqual(msgs[0].metadata["file_name"], "rec.wav")
+        self.assertNotIn("file_name", msgs[1].metadata)
+        # small files are not streamed
+        single = self._messages(chunk_size=20_000)
+        self.assertEqual(len(single), 1)
+        self.assertNotIn("stream_id", single[0].metadata)
+
+    def test_reassembly(self):
+        receiver = StreamReceiver()
+        results = [receiver.handle(m) for m in self._messages()]
+        self.assertEqual(results[:2], [None, None])
+        stream = results[-1]
+        self.assertEqual(stream.metadata, {"file_name": "rec.wav"})
+        self.assertEqual(stream.size, len(self.data))
+        self.assertEqual(stream.file.read(), self.data)
+        self.assertEqual(receiver.streams, {})
+        stream.file.close()
+
+    def test_limits(self):
+        receiver = StreamReceiver(max_size=5000)
+        msgs = self._messages()
+        receiver.handle(msgs[0])
+        with self.assertRaises(StreamError):
+            receiver.handle(msgs[1])  # over max_size
+        self.assertEqual(receiver.streams, {})  # spooled data discarded
+        with self.assertRaises(StreamError):
+            receiver.handle(msgs[2])  # stream was aborted
+
+    def test_shared_budget(self):
+        budget = SpoolBudget(max_size=15_000)
+        first, second = StreamReceiver(budget=budget), StreamReceiver(budget=budget)
+        stream = [first.handle(m) for m in self._messages()][-1]
+        self.assertEqual(budget.used, len(self.data))
+        msgs = self._messages()
+        second.handle(msgs[0])
+        with self.assertRaises(StreamError):
+            second.handle(msgs[1])  # the other client still holds its spool
+        self.assertEqual(budget.used, len(self.data))  # aborted stream gave its space back
+        first.release(stream)
+        self.assertEqual(budget.used, 0)
+        self.assertIsNotNone([second.handle(m) for m in self._messages()][-1])
+
+    def test_bin_type_can_not_change(self):
+        receiver = StreamReceiver()
+        msgs = self._messages()
+        receiver.handle(msgs[0])
+        switched = HiveMessage(HiveMessageType.BINARY, msgs[1].payload, metadata=msgs[1].metadata,
+                               bin_type=HiveMindBinaryPayloadType.TTS_AUDIO)
+        with self.assertRaises(StreamError):
+            receiver.handle(switched)
+        self.assertEqual(receiver.streams, {})
+
+    def test_out_of_order(self):
+        receiver = StreamReceiver()
+        msgs = self._messages()
+        receiver.handle(msgs[0])
+        with self.assertRaises(StreamError):
+            receiver.handle(msgs[2])
+
+    def test_handler_receives_stream(self):
+        received = []
+
+        def dispatch(bin_type, payload, metadata, client):
+            received.append((bin_type, metadata, len(payload), os.path.exists(payload.path), payload.read()))
+
+        proto = mock.Mock(_dispatch_binary=mock.Mock(side_effect=dispatch))
+        client = mock.Mock(streams=None)
+        with mock.patch("hivemind_core.protocol.get_config_snapshot", return_value={}):
+            for m in self._messages():
+                HiveMindListenerProtocol.handle_binary_message(proto, m, client)
+        bin_type, metadata, size, existed, content = received[0]
+        self.assertEqual(bin_type, HiveMindBinaryPayloadType.FILE)
+        self.assertEqual(metadata, {"file_name": "rec.wav"})
+        self.assertEqual(size, len(self.data))
+        self.assertTrue(existed)
+        self.assertEqual(content, self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import time
+import unittest
+from unittest import mock
+
+from hivemind_core.tickets import SessionTicket, TicketIssuer, derive_resumption_key
+
+
+class TestTicketIssuer(unittest.TestCase):
+    ticket = SessionTicket(key="k1", secret=b"s" * 32, cipher="AES-GCM", encoding="JSON-B64",
+                           compression="zlib", batch=True)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(TicketIssuer.from_config({}))
+
+    def test_roundtrip(self):
+        issuer = TicketIssuer(lifetime=60)
+        state = issuer.redeem(issuer.issue(self.ticket), "k1")
+        self.assertEqual(state.secret, self.ticket.secret)
+        self.assertEqual(state.compression, "zlib")
+        self.assertTrue(state.batch)
+        self.assertGreater(state.expires, time.time())
+
+    def test_bound_to_client(self):
+        issuer = TicketIssuer()
+        self.assertIsNone(issuer.redeem(issuer.issue(self.ticket), "k2"))
+
+    def test_expired(self):
+        issuer = TicketIssuer(lifetime=-1)
+        self.assertIsNone(issuer.redeem(issuer.issue(self.ticket), "k1"))
+
+    def test_single_use(self):
+        issuer = TicketIssuer(lifetime=60)
+        ticket = issuer.issue(self.ticket)
+        self.assertIsNotNone(issuer.redeem(ticket, "k1"))
+        self.assertIsNone(issuer.redeem(ticket, "k1"))
+        # the ticket handed out when resuming replaces the redeemed one
+        self.assertIsNotNone(issuer.redeem(issuer.issue(self.ticket), "k1"))
+
+    def test_redeemed_ids_pruned(self):
+        issuer = TicketIssuer(lifetime=60)
+        issuer.redeem(issuer.issue(self.ticket), "k1")
+        self.assertEqual(len(issuer._redeemed), 1)
+        with mock.patch("hivemind_core.tickets.time.time", return_value=time.time() + 120):
+            issuer.redeem(issuer.issue(self.ticket), "k1")
+        self.assertEqual(len(issuer._redeemed), 1)
+
+    def test_other_server(self):
+        # tickets are encrypted with a per process key
+        self.assertIsNone(TicketIssuer().redeem(TicketIssuer().issue(self.ticket), "k1"))
+        self.assertIsNone(TicketIssuer().redeem("garbage", "k1"))
+
+    def test_derived_key(self):
+        k1 = derive_resumption_key(b"s" * 32, b"n" * 16)
+        self.assertEqual(len(k1), 32)
+        self.assertEqual(k1, derive_resumption_key(b"s" * 32, b"n" * 16))
+        self.assertNotEqual(k1, derive_resumption_key(b"s" * 32, b"m" * 16))
+
+
+if __name__ == '__main__':
+    unittest.main()